@@ -0,0 +1,99 @@
+"""
+Run all benchmarks and print results as JSON. Results can be compared with
+results of previous run (for example, of previous release) to find
+regressions.
+
+Usage: python -m benchmarks [--output FILE] [--compare FILE] [--threshold 0.1]
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime
+import platform
+import json
+import sys
+
+from . import events, client, longpoll
+
+
+SUITES = (events, client, longpoll)
+
+
+def collect():
+    """Run benchmarks and return report."""
+
+    results = {}
+
+    for suite in SUITES:
+        results.update(suite.run())
+
+    return {
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Return list of descriptions of results that are worse than results in
+    baseline by more than `threshold` (relative).
+    """
+
+    regressions = []
+
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+
+        if not previous or not previous["value"]:
+            continue
+
+        change = (result["value"] - previous["value"]) / previous["value"]
+
+        if result["better"] == "higher":
+            change = -change
+
+        if change > threshold:
+            regressions.append("{}: {:.2f} -> {:.2f} {} ({:+.0%})".format(
+                name, previous["value"], result["value"], result["unit"], change,
+            ))
+
+    return regressions
+
+
+def main():
+    """Entry point."""
+
+    parser = ArgumentParser(description="Run vkpore's benchmarks.")
+    parser.add_argument("--output", help="file to write report to")
+    parser.add_argument("--compare", help="report to compare results with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="allowed relative slowdown when comparing (default: 0.1)",
+    )
+
+    arguments = parser.parse_args()
+
+    report = collect()
+
+    dumped = json.dumps(report, indent=2, sort_keys=True)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(dumped)
+    else:
+        print(dumped)
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            regressions = compare(report, json.load(file), arguments.threshold)
+
+        for regression in regressions:
+            print("Regression:", regression, file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
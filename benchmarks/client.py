@@ -0,0 +1,108 @@
+"""
+Benchmarks for `VkClient`: building code for `execute` and throughput of
+`request` against in-memory session.
+
+Usage: python -m benchmarks.client
+"""
+
+from time import perf_counter
+from timeit import repeat
+import asyncio
+
+from vkpore.vkclient import VkClient, Request
+from vkpore.batching import Batch
+from vkpore.codec import CODECS, get_codec
+
+from .session import Session
+
+
+def execute_code(codec: str = "json", number: int = 2000) -> float:
+    """
+    Return microseconds spent building code for full batch with codec
+    (without using codes cached in requests).
+    """
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    requests = [
+        Request("messages.send", {
+            "peer_id": 2000000000 + i, "random_id": i,
+            "message": "Привет! " * 20,
+        })
+        for i in range(25)
+    ]
+
+    json_codec = get_codec(codec)
+
+    def build():
+        batch = Batch(json_codec)
+
+        for request in requests:
+            request.code = None
+            batch.add(request)
+
+        return batch.code()
+
+    best = min(repeat(build, number=number, repeat=5))
+
+    loop.close()
+
+    return best / number * 1e6
+
+
+def requests_per_second(total: int = 20000) -> float:
+    """Return amount of requests per second performed through `request`."""
+
+    async def benchmark():
+        # Rate limit is lifted to measure client's own overhead
+        client = VkClient("token", Session(), rate=1e9, burst=1e9)
+        client.start()
+
+        start = perf_counter()
+
+        await asyncio.gather(*(
+            client.request("messages.send", peer_id=i, message="hi")
+            for i in range(total)
+        ))
+
+        elapsed = perf_counter() - start
+
+        await client.stop()
+
+        return total / elapsed
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        return loop.run_until_complete(benchmark())
+    finally:
+        loop.close()
+
+
+def run():
+    """Return results of client's benchmarks."""
+
+    results = {
+        "client.requests_per_second": {
+            "value": requests_per_second(), "unit": "rps", "better": "higher",
+        },
+    }
+
+    for codec in CODECS:
+        try:
+            value = execute_code(codec)
+        except ImportError:
+            continue
+
+        name = "client.execute_code" if codec == "json" else "client.execute_code." + codec
+
+        results[name] = {"value": value, "unit": "us", "better": "lower"}
+
+    return results
+
+
+if __name__ == "__main__":
+    for case, result in run().items():
+        print("{:<30} {:>12.2f} {}".format(case, result["value"], result["unit"]))
@@ -0,0 +1,55 @@
+"""
+Benchmark for creating events from "message_new" updates.
+
+Usage: python -m benchmarks.events
+"""
+
+from timeit import repeat
+
+from vkpore.events import MessageNew
+
+from .payloads import MESSAGE_TEXT, MESSAGE_ATTACHMENTS, MESSAGE_FORWARDS
+
+
+def create(source):
+    """Create event and read its text (typical handler)."""
+    return MessageNew(1, source).text
+
+
+def create_and_read(source):
+    """Create event and read every nested object."""
+
+    event = MessageNew(1, source)
+
+    for message in (event,) + event.fwd_messages:
+        for attachment in message.attachments:
+            getattr(attachment.content, "sizes", None)
+
+
+CASES = (
+    ("text", create, MESSAGE_TEXT),
+    ("attachments", create, MESSAGE_ATTACHMENTS),
+    ("forwards", create, MESSAGE_FORWARDS),
+    ("attachments_read", create_and_read, MESSAGE_ATTACHMENTS),
+    ("forwards_read", create_and_read, MESSAGE_FORWARDS),
+)
+
+
+def run(number: int = 2000):
+    """Return best time in microseconds per call for every case."""
+
+    results = {}
+
+    for name, function, source in CASES:
+        best = min(repeat(lambda: function(source), number=number, repeat=5))
+
+        results["events." + name] = {
+            "value": best / number * 1e6, "unit": "us", "better": "lower",
+        }
+
+    return results
+
+
+if __name__ == "__main__":
+    for case, result in run().items():
+        print("{:<30} {:>12.2f} {}".format(case, result["value"], result["unit"]))
@@ -0,0 +1,69 @@
+"""
+Benchmark for latency between receiving update from longpoll and calling
+callback through `Vkpore`.
+
+Usage: python -m benchmarks.longpoll
+"""
+
+from time import perf_counter
+import asyncio
+
+from vkpore import Vkpore
+
+from .session import Session
+
+
+def latency(samples: int = 5000, updates: int = 25, interval: float = 0.005):
+    """
+    Return median and 99th percentile of latency in milliseconds for
+    `samples` updates received in batches of `updates` every `interval`
+    seconds.
+    """
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    app = Vkpore(["token"], loop=loop, session=Session(updates, interval))
+
+    latencies = []
+    complete = asyncio.Event()
+
+    @app.on("vk:message_new")
+    async def _(event):
+        latencies.append(perf_counter() - event.source["sent"])
+
+        if len(latencies) >= samples:
+            complete.set()
+
+    async def benchmark():
+        await app.start()
+        await complete.wait()
+        await app.stop()
+
+    try:
+        loop.run_until_complete(benchmark())
+    finally:
+        loop.close()
+
+    latencies.sort()
+
+    return (
+        latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000,
+    )
+
+
+def run():
+    """Return results of longpoll's benchmarks."""
+
+    median, percentile = latency()
+
+    return {
+        "longpoll.latency_p50": {"value": median, "unit": "ms", "better": "lower"},
+        "longpoll.latency_p99": {"value": percentile, "unit": "ms", "better": "lower"},
+    }
+
+
+if __name__ == "__main__":
+    for case, result in run().items():
+        print("{:<30} {:>12.3f} {}".format(case, result["value"], result["unit"]))
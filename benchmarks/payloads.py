@@ -0,0 +1,67 @@
+"""Realistic payloads of Vkontakte updates used by benchmarks."""
+
+PHOTO = {
+    "id": 456266978, "album_id": -15, "owner_id": 87641997, "user_id": 100,
+    "text": "", "date": 1557741741, "access_key": "7738f58sd80b6537a",
+    "sizes": [
+        {"type": "m", "url": "https://sun9-1.userapi.com/m.jpg", "width": 130, "height": 73},
+        {"type": "o", "url": "https://sun9-1.userapi.com/o.jpg", "width": 130, "height": 87},
+        {"type": "p", "url": "https://sun9-1.userapi.com/p.jpg", "width": 200, "height": 133},
+        {"type": "q", "url": "https://sun9-1.userapi.com/q.jpg", "width": 320, "height": 213},
+        {"type": "r", "url": "https://sun9-1.userapi.com/r.jpg", "width": 512, "height": 340},
+        {"type": "s", "url": "https://sun9-1.userapi.com/s.jpg", "width": 75, "height": 42},
+        {"type": "x", "url": "https://sun9-1.userapi.com/x.jpg", "width": 604, "height": 340},
+        {"type": "y", "url": "https://sun9-1.userapi.com/y.jpg", "width": 807, "height": 454},
+        {"type": "z", "url": "https://sun9-1.userapi.com/z.jpg", "width": 1080, "height": 607},
+    ],
+}
+
+STICKER = {
+    "product_id": 281, "sticker_id": 9068,
+    "images": [
+        {"url": "https://vk.com/sticker/64.png", "width": 64, "height": 64},
+        {"url": "https://vk.com/sticker/128.png", "width": 128, "height": 128},
+        {"url": "https://vk.com/sticker/256.png", "width": 256, "height": 256},
+    ],
+    "images_with_background": [
+        {"url": "https://vk.com/sticker/64b.png", "width": 64, "height": 64},
+        {"url": "https://vk.com/sticker/128b.png", "width": 128, "height": 128},
+        {"url": "https://vk.com/sticker/256b.png", "width": 256, "height": 256},
+    ],
+}
+
+
+def message(text: str, attachments=(), fwd_messages=(), reply_message=None):
+    """Return object of "message_new" update."""
+
+    source = {
+        "date": 1559038192, "from_id": 87641997, "id": 0, "out": 0,
+        "peer_id": 2000000107, "text": text, "conversation_message_id": 5065,
+        "fwd_messages": list(fwd_messages), "important": False,
+        "random_id": 0, "attachments": list(attachments), "is_hidden": False,
+    }
+
+    if reply_message is not None:
+        source["reply_message"] = reply_message
+
+    return source
+
+
+#: Short text message (most common update)
+MESSAGE_TEXT = message("hello")
+
+#: Message with photos and sticker
+MESSAGE_ATTACHMENTS = message(
+    "look", [{"type": "photo", "photo": PHOTO}] * 5
+    + [{"type": "sticker", "sticker": STICKER}]
+)
+
+#: Message with reply and long chain of forwarded messages with photos
+MESSAGE_FORWARDS = message(
+    "fwd",
+    fwd_messages=[
+        message("forwarded", [{"type": "photo", "photo": PHOTO}] * 3)
+        for _ in range(20)
+    ],
+    reply_message=message("reply", [{"type": "photo", "photo": PHOTO}]),
+)
@@ -0,0 +1,88 @@
+"""In-memory replacement for `aiohttp.ClientSession` used by benchmarks."""
+
+from time import perf_counter
+import asyncio
+
+from .payloads import MESSAGE_TEXT
+
+
+LONGPOLL_SERVER = "longpoll"
+
+
+class _Response:
+    __slots__ = ("body",)
+
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self, **_):
+        """Return prepared body."""
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+
+class Session:
+    """
+    Session that answers API calls without network. Every call to
+    `execute` succeeds, longpoll returns `updates` copies of "message_new"
+    update every `interval` seconds. Updates have "sent" field with
+    `perf_counter` value at the moment of response.
+    """
+
+    def __init__(self, updates: int = 0, interval: float = 0.0):
+        self.updates = updates
+        self.interval = interval
+        self.calls = 0
+
+    async def close(self):
+        """Nothing to close."""
+
+    def post(self, url, data):
+        """Return response for call."""
+
+        self.calls += 1
+
+        if url == LONGPOLL_SERVER:
+            return _LongpollResponse(self)
+
+        if url.endswith("execute"):
+            code = data["code"]
+            response = []
+
+            for part in code.split("API.")[1:]:
+                if part.startswith("groups.getLongPollServer"):
+                    response.append({"server": LONGPOLL_SERVER, "key": "k", "ts": 1})
+                else:
+                    response.append(1)
+
+            return _Response({"response": response})
+
+        if url.endswith("groups.getById"):
+            return _Response({"response": [{"id": 1, "name": "Group"}]})
+
+        return _Response({"response": 1})
+
+
+class _LongpollResponse(_Response):
+    __slots__ = ("session",)
+
+    def __init__(self, session):  # pylint: disable=super-init-not-called
+        self.session = session
+
+    async def json(self, **_):
+        await asyncio.sleep(self.session.interval)
+
+        sent = perf_counter()
+
+        return {
+            "ts": 2,
+            "updates": [
+                {"type": "message_new", "object": {**MESSAGE_TEXT, "sent": sent}}
+                for _ in range(self.session.updates)
+            ],
+        }
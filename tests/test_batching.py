@@ -0,0 +1,149 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import pytest
+
+from vkpore.batching import Batch, BatchSizer, SizerOptions, FusedRequest, FUSIONS
+from vkpore.codec import get_codec
+from vkpore.scheduling import Request
+
+
+@pytest.mark.asyncio
+async def test_batch():
+    batch = Batch(get_codec(), limit=2)
+
+    first = Request("a", {"x": "й"})
+
+    assert batch.add(first)
+    assert first.code == 'API.a({"x": "й"}),'.encode()
+    assert batch.size == 10 + len(first.code)
+
+    assert batch.add(Request("b", {}))
+    assert batch.full
+    assert not batch.add(Request("c", {}))
+
+    assert batch.code() == 'return [API.a({"x": "й"}),API.b({}),];'
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit():
+    batch = Batch(get_codec(), size_limit=75)
+
+    small = Request("a", {"text": "x" * 10})
+    big = Request("a", {"text": "x" * 100})
+
+    assert batch.oversized(big)
+    assert not batch.oversized(small)
+
+    assert batch.add(small)
+    assert batch.add(small)
+    assert not batch.add(small)
+    assert len(batch.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_cached_code():
+    batch = Batch(get_codec())
+
+    request = Request("a", {"x": 1})
+    request.code = b"API.cached(),"
+
+    batch.add(request)
+
+    assert batch.code() == "return [API.cached(),];"
+
+
+def test_sizer():
+    sizer = BatchSizer(minimum=2, maximum=10, target=1.0)
+
+    assert sizer.size == 10
+
+    sizer.overload()
+    assert sizer.size == 5
+
+    sizer.success(0.5)
+    assert sizer.size == 6
+    assert sizer.latency == 0.5
+
+    sizer.success(3.0)
+    assert sizer.size == 3
+    assert sizer.latency == pytest.approx(1.0)
+
+    for _ in range(3):
+        sizer.overload()
+
+    assert sizer.size == 2
+
+    for _ in range(20):
+        sizer.success(0.1)
+
+    assert sizer.size == 10
+
+    options = SizerOptions(maximum=4, decrease=0.25)
+
+    assert BatchSizer(options).size == 4
+    assert BatchSizer(options, maximum=8).size == 8
+
+    sizer = BatchSizer(options)
+    sizer.overload()
+    assert sizer.size == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_fusion():
+    batch = Batch(get_codec(), fusions=FUSIONS)
+
+    requests = [
+        Request("users.get", {"user_ids": 1, "fields": "sex"}),
+        Request("users.get", {"user_ids": "2,3", "fields": "sex"}),
+        Request("users.get", {"user_ids": 4}),
+        Request("users.get", {"user_ids": "durov"}),
+    ]
+
+    for request in requests:
+        assert batch.add(request)
+
+    assert len(batch.requests) == 3
+    assert batch.originals == requests
+
+    fused = batch.requests[0]
+
+    assert isinstance(fused, FusedRequest)
+    assert fused.parts == requests[:2]
+    assert fused.arguments == {"user_ids": "1,2,3", "fields": "sex"}
+
+    code = batch.code()
+
+    assert len(code.encode()) == batch.size
+    assert 'API.users.get({"user_ids": "1,2,3", "fields": "sex"}),' in code
+
+    assert fused.split([{"id": 3}, {"id": 1}]) == [[{"id": 1}], [{"id": 3}]]
+
+
+@pytest.mark.asyncio
+async def test_batch_fusion_limit():
+    batch = Batch(get_codec(), fusions=FUSIONS)
+
+    for _ in range(100):
+        assert batch.add(Request("messages.getConversationsById", {"peer_ids": "1,2"}))
+
+    assert len(batch.requests) == 2
+    assert batch.requests[0].count == 100
+
+
+def test_split_conversations():
+    fused = FusedRequest(
+        Request("messages.getConversationsById", {"peer_ids": 1}),
+        FUSIONS["messages.getConversationsById"], ["1"],
+    )
+
+    fused.ids.append(["2", "3"])
+
+    response = {
+        "count": 2,
+        "items": [{"peer": {"id": 1}}, {"peer": {"id": 3}}],
+        "profiles": [],
+    }
+
+    assert fused.split(response) == [
+        {"count": 1, "items": [{"peer": {"id": 1}}], "profiles": []},
+        {"count": 1, "items": [{"peer": {"id": 3}}], "profiles": []},
+    ]
@@ -0,0 +1,77 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import asyncio
+import pytest
+
+from vkpore import VkClient
+from vkpore.cache import ResponseCache, MemoryBackend
+from .testing_tools import Session
+
+
+@pytest.mark.asyncio
+async def test_memory_backend():
+    backend = MemoryBackend(max_entries=2)
+
+    await backend.set("a", 1, 10)
+    await backend.set("b", 2, 10)
+
+    assert await backend.get("a") == 1
+
+    await backend.set("c", 3, 10)
+
+    assert len(backend) == 2
+    assert await backend.get("b") is None
+    assert await backend.get("a") == 1
+    assert await backend.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_ttl():
+    backend = MemoryBackend()
+
+    await backend.set("a", 1, 0.01)
+
+    assert await backend.get("a") == 1
+
+    await asyncio.sleep(0.02)
+
+    assert await backend.get("a") is None
+    assert not backend
+
+
+@pytest.mark.asyncio
+async def test_response_cache():
+    cache = ResponseCache({"users.get": 10})
+
+    assert cache.caches("users.get")
+    assert not cache.caches("messages.send")
+
+    assert await cache.get("users.get", {"user_ids": 1, "fields": "sex"}) is None
+
+    await cache.set("users.get", {"user_ids": 1, "fields": "sex"}, [1])
+    await cache.set("users.get", {"user_ids": 2}, None)
+
+    assert await cache.get("users.get", {"fields": "sex", "user_ids": 1}) == [1]
+    assert await cache.get("users.get", {"user_ids": 2}) is None
+
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_client_cache():
+    cache = ResponseCache({"users.get": 10, "groups.getById": 10})
+    client = VkClient("token", session=Session(), cache=cache)
+
+    client.start()
+
+    assert await client.request("users.get", user_ids=1) == [{"id": 1}]
+    assert await client.request("users.get", user_ids=1) == [{"id": 1}]
+    assert await client.request("messages.send", user_id=1, message="hey") == 7347
+
+    await client.stop()
+
+    assert await client.raw_request("groups.getById") == [{"id": 1, "name": "Group"}]
+    assert await client.raw_request("groups.getById") == [{"id": 1, "name": "Group"}]
+    assert await client.raw_request("test.fail") is None
+
+    assert len(client._session.calls) == 4
+    assert (cache.hits, cache.misses) == (2, 2)
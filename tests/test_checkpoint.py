@@ -0,0 +1,102 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import asyncio
+import pytest
+
+from vkpore import Vkpore
+from vkpore.checkpoint import (
+    CheckpointStore, FileCheckpoint, SqliteCheckpoint, Checkpointer,
+)
+from vkpore.emulator import Emulator, message_new
+
+
+class MemoryCheckpoint(CheckpointStore):
+    def __init__(self):
+        self.states = {}
+        self.saves = 0
+
+    async def load(self, group_id):
+        return self.states.get(group_id)
+
+    async def save(self, states):
+        self.saves += 1
+        self.states.update(states)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store_class, name", [
+    (FileCheckpoint, "checkpoint.json"), (SqliteCheckpoint, "checkpoint.db"),
+])
+async def test_store(tmp_path, store_class, name):
+    store = store_class(str(tmp_path / name))
+
+    assert await store.load(1) is None
+
+    await store.save({1: {"server": "a", "key": "b", "ts": 10}})
+    await store.save({2: {"server": "c", "key": "d", "ts": 20}})
+    await store.save({1: {"server": "a", "key": "b", "ts": 11}})
+
+    store = store_class(str(tmp_path / name))
+
+    first, second = await store.load(1), await store.load(2)
+
+    assert (first["server"], first["key"], int(first["ts"])) == ("a", "b", 11)
+    assert (second["server"], second["key"], int(second["ts"])) == ("c", "d", 20)
+
+
+@pytest.mark.asyncio
+async def test_checkpointer_debounce():
+    store = MemoryCheckpoint()
+    checkpointer = Checkpointer(store, interval=0.05)
+    checkpointer.start()
+
+    for ts in range(20):
+        checkpointer.update(1, {"server": "a", "key": "b", "ts": ts})
+        await asyncio.sleep(0.01)
+
+    await checkpointer.stop()
+
+    assert 1 < store.saves < 10
+    assert store.states[1]["ts"] == 19
+
+
+@pytest.mark.asyncio
+async def test_resume(tmp_path):
+    emulator = Emulator(longpoll_wait=0.05)
+    await emulator.start()
+
+    store = FileCheckpoint(str(tmp_path / "checkpoint.json"))
+    received = []
+
+    async def run(*numbers):
+        app = Vkpore(["token"], api_url=emulator.api_url, checkpoint=store)
+
+        @app.on("vk:message_new")
+        async def _(event):
+            received.append(event.text)
+
+        await app.start()
+
+        # Fresh start receives only updates after longpoll server is received
+        while not emulator.calls["groups.getLongPollServer"]:
+            await asyncio.sleep(0.01)
+
+        for number in numbers:
+            update = message_new(number)
+            emulator.push(update["type"], update["object"])
+
+        while len(received) < numbers[-1]:
+            await asyncio.sleep(0.01)
+
+        await app.stop()
+
+    await run(1, 2)
+
+    # Updates that arrived while application was stopped are not lost
+    update = message_new(3)
+    emulator.push(update["type"], update["object"])
+    emulator.expire_key()
+
+    await run(4)
+    await emulator.stop()
+
+    assert received == ["message {}".format(n) for n in range(1, 5)]
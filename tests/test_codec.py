@@ -0,0 +1,31 @@
+# pylint: disable=missing-docstring
+import pytest
+
+from vkpore.codec import JsonCodec, get_codec, CODECS
+
+
+def test_get_codec():
+    codec = get_codec()
+
+    assert codec.name == "json"
+    assert get_codec(codec) is codec
+    assert get_codec("auto").name in CODECS
+
+    with pytest.raises(ValueError):
+        get_codec("unknown")
+
+
+@pytest.mark.parametrize("name", list(CODECS))
+def test_codec(name):
+    pytest.importorskip(name)
+
+    codec = get_codec(name)
+
+    assert isinstance(codec, JsonCodec)
+
+    obj = {"text": "Привет/", "number": 1, "list": [True, None]}
+
+    assert isinstance(codec.dumps(obj), str)
+    assert "Привет/" in codec.dumps(obj)
+    assert codec.loads(codec.dumps(obj)) == obj
+    assert codec.loads(codec.dumps(obj).encode()) == obj
@@ -0,0 +1,182 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import asyncio
+import pytest
+
+from vkpore.dispatcher import Dispatcher, EventStream
+
+
+@pytest.mark.asyncio
+async def test_cleanup():
+    dispatcher = Dispatcher()
+
+    async def handler():
+        pass
+
+    futures = [dispatcher.run("vk:raw", handler()) for _ in range(10)]
+
+    assert dispatcher.running == 10
+    assert dispatcher.running_for("vk:raw") == 10
+
+    await asyncio.gather(*futures)
+
+    assert dispatcher.running == 0
+    assert dispatcher.running_for("vk:raw") == 0
+    assert not dispatcher._running_per_event
+
+
+@pytest.mark.asyncio
+async def test_limits():
+    dispatcher = Dispatcher(limit=3, limit_per_event=2)
+
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+
+    dispatcher.run("a", handler())
+    dispatcher.run("a", handler())
+
+    assert not dispatcher.has_capacity("a")
+    assert dispatcher.has_capacity("b")
+
+    dispatcher.run("b", handler())
+
+    assert not dispatcher.has_capacity("b")
+
+    waiter = asyncio.ensure_future(dispatcher.wait("b"))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    release.set()
+
+    await asyncio.wait_for(waiter, 1)
+    await dispatcher.join()
+
+    assert dispatcher.running == 0
+
+
+@pytest.mark.asyncio
+async def test_join_with_exceptions():
+    dispatcher = Dispatcher()
+
+    async def handler():
+        raise RuntimeError
+
+    dispatcher.run("a", handler())
+
+    await dispatcher.join()
+
+    assert dispatcher.running == 0
+
+
+def test_stream_accepts():
+    assert EventStream().accepts("a", 1)
+    assert EventStream(["a"]).accepts("a", 1)
+    assert not EventStream(["a"]).accepts("b", 1)
+    assert EventStream(group_ids=[1]).accepts("a", 1)
+    assert not EventStream(["a"], [1]).accepts("a", 2)
+
+
+@pytest.mark.asyncio
+async def test_stream_backpressure():
+    stream = EventStream(maxsize=2)
+
+    await stream.put(1)
+    await stream.put(2)
+
+    blocked = asyncio.ensure_future(stream.put(3))
+    await asyncio.sleep(0.01)
+
+    assert not blocked.done()
+    assert len(stream) == 2
+
+    assert await stream.get() == 1
+    await blocked
+
+    assert len(stream) == 2
+
+    getter = asyncio.ensure_future(asyncio.gather(*(stream.get() for _ in range(3))))
+    await asyncio.sleep(0.01)
+
+    stream.close()
+
+    assert stream.closed
+    assert await getter == [2, 3, None]
+
+    await stream.put(4)
+    assert not stream
+
+
+@pytest.mark.asyncio
+async def test_keys():
+    dispatcher = Dispatcher()
+
+    order = []
+
+    async def handler(key, number, delay):
+        await asyncio.sleep(delay)
+        order.append((key, number))
+
+    # Slow first handler doesn't let second handler of the same key overtake
+    dispatcher.run("a", handler("x", 1, 0.03), key="x")
+    dispatcher.run("a", handler("x", 2, 0), key="x")
+    dispatcher.run("a", handler("y", 1, 0.01), key="y")
+    dispatcher.run("a", handler(None, 1, 0), key=None)
+
+    assert dispatcher.active_keys == 2
+
+    await dispatcher.join()
+
+    assert order == [(None, 1), ("y", 1), ("x", 1), ("x", 2)]
+    assert dispatcher.active_keys == 0
+    assert dispatcher.running == 0
+
+
+@pytest.mark.asyncio
+async def test_keys_failed_and_cancelled():
+    dispatcher = Dispatcher()
+
+    order = []
+
+    async def fail():
+        raise ValueError
+
+    async def handler():
+        order.append(1)
+
+    dispatcher.run("a", fail(), key="x")
+    cancelled = dispatcher.run("a", handler(), key="x")
+    dispatcher.run("a", handler(), key="x")
+
+    cancelled.cancel()
+
+    await dispatcher.join()
+
+    assert order == [1]
+    assert dispatcher.active_keys == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_keys():
+    dispatcher = Dispatcher(limit_keys=2)
+
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+
+    dispatcher.run("a", handler(), key=1)
+    dispatcher.run("a", handler(), key=2)
+
+    assert dispatcher.has_capacity("a", 1)
+    assert dispatcher.has_capacity("a")
+    assert not dispatcher.has_capacity("a", 3)
+
+    waiter = asyncio.ensure_future(dispatcher.wait("a", 3))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    release.set()
+
+    await asyncio.wait_for(waiter, 1)
+    await dispatcher.join()
@@ -0,0 +1,146 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import asyncio
+import pytest
+
+from aiohttp import ClientSession
+
+from vkpore import Vkpore, VkClient, VkApiError
+from vkpore.vkclient import RetryPolicy
+from vkpore.emulator import Emulator, EmulatorOptions, parse_code
+
+
+@pytest.fixture
+async def emulator():
+    emulator = Emulator(longpoll_wait=0.05)
+    await emulator.start()
+    yield emulator
+    await emulator.stop()
+
+
+def test_options():
+    options = EmulatorOptions(rate=5, event_factory=lambda number: {"number": number})
+    emulator = Emulator(options=options, latency=0.1)
+
+    assert emulator.options.rate == 5
+    assert emulator.options.latency == 0.1
+    assert emulator.options.event_factory(1) == {"number": 1}
+    assert options.latency == 0.0
+
+    # Default factory is not bound to options
+    assert EmulatorOptions().event_factory(1)["type"] == "message_new"
+
+    with pytest.raises(TypeError):
+        Emulator(speed=1)
+
+
+def test_parse_code():
+    assert parse_code('return [API.a.b({"x": "1)"}), API.c()];') == [
+        ("a.b", {"x": "1)"}), ("c", {}),
+    ]
+
+    assert parse_code("return [];") == []
+
+    for code in ("API.a();", "return [API.a(1)];", "return [API.a({}];", "return [x];"):
+        with pytest.raises(VkApiError) as error:
+            parse_code(code)
+
+        assert error.value.code == 12
+
+
+@pytest.mark.asyncio
+async def test_requests(emulator):
+    async with ClientSession() as session:
+        client = VkClient("token", session, api_url=emulator.api_url)
+        await client.initialize()
+
+        assert client.group_id == 1
+        assert client.group_name == "Emulator"
+
+        client.start()
+
+        results = await asyncio.gather(
+            client.request("users.get", user_ids="1,2"),
+            client.request("messages.send", peer_id=1, message="hi"),
+            client.request("unknown.method"),
+            return_exceptions=True,
+        )
+
+        await client.stop()
+
+    assert [user["id"] for user in results[0]] == [1, 2]
+    assert results[1] == 1
+    assert isinstance(results[2], VkApiError) and results[2].code == 3
+    assert emulator.calls["execute"] == 1
+    assert emulator.calls["messages.send"] == 1
+
+
+@pytest.mark.asyncio
+async def test_flood(emulator):
+    emulator.options.rate = 2
+
+    async with ClientSession() as session:
+        client = VkClient(
+            "token", session, rate=1000, burst=1000, api_url=emulator.api_url,
+            retry=RetryPolicy(attempts=1),
+        )
+
+        results = await asyncio.gather(*(
+            client.raw_request("groups.getById") for _ in range(3)
+        ))
+
+    assert results.count(None) == 1
+    assert emulator.flooded == 1
+
+
+@pytest.mark.asyncio
+async def test_longpoll(emulator):
+    emulator.options.events_per_second = 1000
+
+    await emulator.stop()
+    await emulator.start()
+
+    received = []
+
+    app = Vkpore(["token"], api_url=emulator.api_url)
+
+    @app.on("vk:message_new")
+    async def _(event):
+        received.append(event.text)
+
+    await app.start()
+
+    while len(received) < 50:
+        await asyncio.sleep(0.01)
+
+    await app.stop()
+
+    # Updates are received in order and without gaps
+    numbers = [int(text.split()[1]) for text in received]
+    assert numbers == list(range(numbers[0], numbers[0] + len(numbers)))
+    assert emulator.delivered >= 50
+
+
+@pytest.mark.asyncio
+async def test_longpoll_failures(emulator):
+    async with ClientSession() as session:
+        longpoll = {"server": emulator.url + "/longpoll", "key": "key0", "ts": 1}
+
+        async def check(**arguments):
+            async with session.post(longpoll["server"], data=arguments) as response:
+                return await response.json()
+
+        assert await check(key="wrong", ts=1, wait=1) == {"failed": 2}
+        assert await check(key="key0", ts=5, wait=1) == {"failed": 1, "ts": 1}
+        assert await check(key="key0", ts=1, wait=1) == {"ts": 1, "updates": []}
+
+        emulator.options.history = 2
+
+        for number in range(3):
+            emulator.push("no", number)
+
+        assert await check(key="key0", ts=1, wait=1) == {"failed": 1, "ts": 4}
+
+        body = await check(key="key0", ts=2, wait=1)
+
+        assert body["ts"] == 4
+        assert [update["object"] for update in body["updates"]] == [1, 2]
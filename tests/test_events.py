@@ -1,7 +1,7 @@
 # pylint: disable=missing-docstring,protected-access,redefined-outer-name
 import pytest
 
-from vkpore.events import Event, MessageData
+from vkpore.events import Event, MessageData, EVENTS
 
 @pytest.mark.asyncio
 async def test_initialization():
@@ -264,3 +264,80 @@ def test_message_data_with_all_attachments():
     assert attachment.content.copy_history[0].type == "wall"
     assert attachment.content.copy_history[0].id == 46592
     assert attachment.content.copy_history[0].attachments[0].content.id == 456268179
+
+def test_message_data_lazy():
+    message_data = MessageData("name", 7, {
+        "text": "Hi",
+        "action": {"type": "chat_title_update"},
+        "reply_message": {"text": "Wes Anderson"},
+        "attachments": [{"type": "photo", "photo": {"sizes": [{"type": "m"}]}}],
+    })
+
+    assert not hasattr(message_data, "_attachments")
+    assert not hasattr(message_data, "_reply_message")
+
+    assert message_data.attachments is message_data.attachments
+    assert message_data.reply_message is message_data.reply_message
+
+    attachment = message_data.attachments[0]
+
+    assert not hasattr(attachment, "_content")
+    assert attachment.content.sizes[0].type == "m"
+    assert attachment.content is attachment.content
+
+    assert message_data.fwd_messages == ()
+
+    with pytest.raises(AttributeError):
+        message_data.action = None
+
+    with pytest.raises(AttributeError):
+        attachment.content = None
+
+def test_registry():
+    for update_type, event_class in EVENTS.items():
+        event = event_class(1, {})
+
+        assert event.name == "vk:" + update_type
+        assert event.group_id == 1
+
+def test_group_events():
+    event = EVENTS["group_join"](1, {"user_id": 5, "join_type": "join"})
+    assert event.user_id == 5
+    assert event.join_type == "join"
+
+    event = EVENTS["group_leave"](1, {"user_id": 5, "self": 1})
+    assert event.user_id == 5
+    assert event.self
+
+    event = EVENTS["like_add"](1, {
+        "liker_id": 5, "object_type": "post", "object_owner_id": -1,
+        "object_id": 10, "post_id": 0, "thread_reply_id": 0,
+    })
+    assert event.liker_id == 5
+    assert event.object_type == "post"
+
+    with pytest.raises(AttributeError):
+        event.liker_id = 6
+
+def test_wall_events():
+    event = EVENTS["wall_post_new"](1, {
+        "id": 28, "from_id": -1, "owner_id": -1, "date": 1519631591,
+        "post_type": "post", "text": "Post",
+        "attachments": [{"type": "photo", "photo": {"id": 3}}],
+    })
+    assert event.text == "Post"
+    assert event.attachments[0].content.id == 3
+    assert event.attachments is event.post.attachments
+    assert event.copy_history == ()
+    assert event.post.from_id == -1
+
+    event = EVENTS["wall_reply_new"](1, {
+        "id": 2, "from_id": 5, "date": 1519631591, "text": "Comment",
+        "post_owner_id": -1, "post_id": 28,
+    })
+    assert event.text == "Comment"
+    assert event.post_id == 28
+    assert event.attachments == ()
+
+    event = EVENTS["photo_new"](1, {"id": 3, "owner_id": -1})
+    assert event.photo.id == 3
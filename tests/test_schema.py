@@ -0,0 +1,79 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import pytest
+
+from vkpore.schema import Schema, field
+from vkpore.utils import lazy_property
+from vkpore.objects import AttachmentContent, Photo, StickerSize
+
+
+class Item(Schema):
+    id: int = field(int, 0)
+    title: str = field(default="", key=("title", "name"))
+    count: int = field(int, 0, key="counters.count")
+    tags: list = field(default=list)
+    source: dict = field(from_source=False)
+
+    def __init__(self, source):
+        object.__setattr__(self, "source", source)
+        self._read_fields(source)
+
+    @lazy_property
+    def size(self):
+        return len(self.source)
+
+
+class SubItem(Item):
+    flag: bool = field(bool, False)
+
+
+def test_fields():
+    item = Item({"id": "5", "name": "Name", "counters": {"count": 3}})
+
+    assert item.id == 5
+    assert item.title == "Name"
+    assert item.count == 3
+    assert item.tags == []
+    assert item.tags is not Item({}).tags
+    assert item.size == 3
+
+    item = Item({"id": None, "counters": None})
+
+    assert item.id == 0
+    assert item.count == 0
+
+
+def test_inheritance():
+    item = SubItem({"id": 1, "title": "Title", "flag": 1})
+
+    assert item.id == 1
+    assert item.title == "Title"
+    assert item.flag is True
+
+
+def test_read_only():
+    item = SubItem({})
+
+    for name in ("id", "title", "flag", "source", "size"):
+        with pytest.raises(AttributeError):
+            setattr(item, name, None)
+
+    with pytest.raises(AttributeError):
+        item.unknown = 1
+
+
+def test_slots():
+    assert not hasattr(StickerSize({}), "__dict__")
+    assert "_size" in Item.__slots__
+
+
+def test_legacy_content():
+    class Custom(AttachmentContent):  # pylint: disable=too-few-public-methods
+        def __init__(self, source):
+            super().__init__("custom", source)
+
+    with pytest.warns(DeprecationWarning):
+        content = Custom({"id": 1, "owner_id": 2})
+
+    assert content.type == "custom"
+    assert content.prepared == "custom2_1"
+    assert Photo({"id": 1}).type == "photo"
@@ -0,0 +1,213 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+from functools import partial
+import multiprocessing
+import asyncio
+import signal
+import time
+import os
+import pytest
+
+from vkpore import Vkpore
+from vkpore.emulator import Emulator, message_new
+from vkpore.supervisor import Supervisor, SupervisorOptions, update_peer_id
+
+
+def create_app(api_url, **options):
+    app = Vkpore(["token"], api_url=api_url, **options)
+
+    @app.on("vk:message_new")
+    async def _(event):
+        await event.request(
+            "messages.send", peer_id=event.peer_id, message=str(os.getpid()),
+        )
+
+    return app
+
+
+@pytest.fixture
+async def emulator():
+    emulator = Emulator(longpoll_wait=0.05)
+
+    emulator.sent = []
+    emulator.handlers["messages.send"] = lambda arguments: emulator.sent.append(
+        (int(arguments["peer_id"]), int(arguments["message"]))
+    ) or 1
+
+    await emulator.start()
+    yield emulator
+    await emulator.stop()
+
+
+async def supervise(emulator, sharding, amount):
+    supervisor = Supervisor(
+        partial(create_app, emulator.api_url), workers=2, sharding=sharding,
+        context=multiprocessing.get_context("fork"),
+    )
+
+    await supervisor.start()
+
+    # Let workers (or supervisor) start receiving updates
+    while emulator.calls["groups.getLongPollServer"] < 1:
+        await asyncio.sleep(0.01)
+
+    for number in range(amount):
+        update = message_new(number)
+        emulator.push(update["type"], update["object"])
+
+    while len(emulator.sent) < amount:
+        await asyncio.sleep(0.01)
+
+    await supervisor.stop()
+
+    assert all(process is None for process in supervisor.processes)
+
+    return supervisor
+
+
+def test_update_peer_id():
+    assert update_peer_id({"object": {"peer_id": 5}}) == 5
+    assert update_peer_id({"object": {"message": {"peer_id": 6}}}) == 6
+    assert update_peer_id({"object": {"user_id": 7}}) == 7
+    assert update_peer_id({"object": {}}) is None
+    assert update_peer_id({"object": 1}) is None
+
+
+def test_sharding():
+    with pytest.raises(ValueError):
+        Supervisor(create_app, sharding="unknown")
+
+
+def test_options():
+    supervisor = Supervisor(create_app, workers=2)
+    assert supervisor._options(1) == {"shard": (1, 2)}
+
+    # Workers share tokens, so they share rate limit too
+    supervisor = Supervisor(create_app, workers=2, sharding="peer", rate=10)
+    assert supervisor._options(1) == {"longpoll": False, "rate": 5}
+
+    options = SupervisorOptions(rate=8, stop_timeout=1.0)
+    supervisor = Supervisor(create_app, workers=2, options=options, rate=4)
+    assert supervisor.options.rate == 4
+    assert supervisor.options.stop_timeout == 1.0
+    assert options.rate == 8
+
+    with pytest.raises(TypeError):
+        Supervisor(create_app, unknown=1)
+
+
+@pytest.mark.asyncio
+async def test_group_sharding(emulator):
+    await supervise(emulator, "group", 10)
+
+    # Only one of workers receives updates for the group
+    assert len({pid for _, pid in emulator.sent}) == 1
+    assert emulator.calls["groups.getLongPollServer"] == 1
+
+
+@pytest.mark.asyncio
+async def test_peer_sharding(emulator):
+    await supervise(emulator, "peer", 20)
+
+    workers = {}
+
+    for peer_id, pid in emulator.sent:
+        workers.setdefault(peer_id % 2, set()).add(pid)
+
+    # Peers are spread between workers and every peer stays with one worker
+    assert len(workers) == 2
+    assert all(len(pids) == 1 for pids in workers.values())
+    assert workers[0] != workers[1]
+
+    # Supervisor receives updates with longpoll enabled in it's client
+    assert emulator.calls["groups.setLongPollSettings"] == 1
+    assert emulator.flooded == 0
+
+
+@pytest.mark.asyncio
+async def test_restart(emulator):
+    supervisor = Supervisor(
+        partial(create_app, emulator.api_url), workers=1, restart_delay=0.01,
+        context=multiprocessing.get_context("fork"),
+    )
+
+    await supervisor.start()
+
+    process = supervisor.processes[0]
+    os.kill(process.pid, signal.SIGKILL)
+
+    while supervisor.restarts < 1 or supervisor.processes[0] is None:
+        await asyncio.sleep(0.05)
+
+    assert supervisor.processes[0] is not process
+    assert supervisor.processes[0].is_alive()
+
+    await supervisor.stop()
+
+    assert supervisor.restarts == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_stuck_worker():
+    context = multiprocessing.get_context("fork")
+
+    supervisor = Supervisor(
+        create_app, workers=1, sharding="peer", queue_size=1, stop_timeout=0.1,
+        context=context,
+    )
+
+    # Worker that doesn't take updates from it's full queue
+    process = context.Process(target=time.sleep, args=(10,), daemon=True)
+    process.start()
+
+    supervisor._processes[0] = process
+    supervisor._queues[0].put((1, []))
+
+    await asyncio.wait_for(supervisor.stop(), 5)
+
+    assert not process.is_alive()
+    assert supervisor.processes == [None]
+
+
+@pytest.mark.asyncio
+async def test_route_errors(monkeypatch):
+    monkeypatch.setattr("vkpore.supervisor.LONGPOLL_ERROR_DELAY", 0)
+
+    responses = [RuntimeError, [{"type": "no", "object": {"peer_id": 1}}]]
+
+    class Receiver:
+        server = "server"
+
+        async def __call__(self):
+            response = responses.pop(0) if responses else None
+
+            if isinstance(response, type):
+                raise response()
+
+            await asyncio.sleep(0)
+
+            return response
+
+    receiver = Receiver()
+
+    class Client:
+        @staticmethod
+        def longpoll():
+            return receiver
+
+    supervisor = Supervisor(
+        create_app, workers=1, sharding="peer",
+        context=multiprocessing.get_context("fork"),
+    )
+
+    router = asyncio.ensure_future(supervisor._route(1, Client()))
+
+    # Unexpected error is logged and receiving continues with new server
+    loop = asyncio.get_event_loop()
+
+    assert await loop.run_in_executor(None, supervisor._queues[0].get, True, 1) == (
+        1, [{"type": "no", "object": {"peer_id": 1}}]
+    )
+    assert receiver.server == ""
+
+    router.cancel()
+    await asyncio.gather(router, return_exceptions=True)
@@ -0,0 +1,49 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import time
+import pytest
+
+from vkpore.utils import TokenBucket, read_only_properties
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(10, burst=3)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    assert 0 < bucket.delay() <= 0.1
+
+
+def test_token_bucket_wrong_arguments():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+    with pytest.raises(ValueError):
+        TokenBucket(1, window=0)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_acquire():
+    bucket = TokenBucket(50, burst=1)
+
+    start = time.monotonic()
+
+    for _ in range(6):
+        await bucket.acquire()
+
+    assert 0.09 <= time.monotonic() - start < 0.5
+
+
+def test_read_only_properties():
+    with pytest.warns(DeprecationWarning):
+        @read_only_properties("name")
+        class Item:  # pylint: disable=too-few-public-methods
+            def __init__(self):
+                self.name = "name"
+
+    item = Item()
+
+    with pytest.raises(AttributeError):
+        item.name = "other"
@@ -1,8 +1,13 @@
 # pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import asyncio
+import json
+import time
 import pytest
 import aiohttp
 
-from vkpore.vkclient import VkClient
+from vkpore.vkclient import VkClient, VkApiError, RetryPolicy, Request, RequestQueue
+from vkpore.vkclient import ClientOptions
+from vkpore.batching import Fusion, FUSIONS, BatchSizer
 from .testing_tools import Session
 
 
@@ -30,6 +35,19 @@ async def test_initialization():
     ]
 
 
+def test_options():
+    options = ClientOptions(rate=5)
+
+    client = VkClient("token", session=Session(), options=options, burst=2)
+
+    assert client.options.rate == 5
+    assert client.options.burst == 2
+    assert options.burst != 2
+
+    with pytest.raises(TypeError):
+        VkClient("token", session=Session(), rates=5)
+
+
 @pytest.mark.asyncio
 async def test_loop_twice():
     client = VkClient("token", session=Session())
@@ -93,14 +111,474 @@ async def test_request_fail():
 
     client.start()
 
-    response = await client.request(
-        "messages.send", user_id=1, message="hey",
+    with pytest.raises(VkApiError) as error:
+        await client.request("messages.send", user_id=1, message="hey")
+
+    assert error.value.code == 0
+
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_request_partial_fail():
+    client = VkClient("token", session=Session())
+
+    client.start()
+
+    results = await asyncio.gather(
+        client.request("messages.send", user_id=1, message="hey"),
+        client.request("test.fail", user_id=1),
+        client.request("messages.send", user_id=2, message="hey"),
+        return_exceptions=True,
     )
 
-    assert response is None
+    assert len(client._session.calls) == 1
+
+    assert results[0] == 7347
+    assert results[2] == 7347
+
+    assert isinstance(results[1], VkApiError)
+    assert results[1].code == 100
+    assert results[1].method == "test.fail"
+
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_request_size_limit():
+    client = VkClient("token", session=Session(), code_size_limit=100)
+
+    client.start()
+
+    results = await asyncio.gather(
+        client.request("messages.send", user_id=1, message="a" * 30),
+        client.request("messages.send", user_id=2, message="b" * 30),
+        client.request("messages.send", user_id=3, message="c" * 200),
+    )
+
+    await client.stop()
+
+    assert results == [7347, 7347, 7347]
+
+    urls = sorted(call[0] for call in client._session.calls)
+
+    assert urls == [
+        "https://api.vk.com/method/execute",
+        "https://api.vk.com/method/execute",
+        "https://api.vk.com/method/messages.send",
+    ]
+
+    for url, data in client._session.calls:
+        if url.endswith("execute"):
+            assert len(data["code"].encode()) <= 100
+
+@pytest.mark.asyncio
+async def test_request_directly_encoding():
+    client = VkClient("token", session=Session(), code_size_limit=100)
+
+    client.start()
+
+    keyboard = {"one_time": True, "buttons": [[{"label": "x" * 100}]]}
+
+    result = await client.request(
+        "messages.send", user_ids=[1, 2], keyboard=keyboard, message="hey",
+    )
+
+    await client.stop()
+
+    assert result == 7347
+
+    url, data = client._session.calls[-1]
+
+    assert url.endswith("messages.send")
+    assert data["user_ids"] == "1,2"
+    assert json.loads(data["keyboard"]) == keyboard
+    assert data["message"] == "hey"
+
+@pytest.mark.asyncio
+async def test_request_directly_fail():
+    client = VkClient(
+        "token", session=Session(), code_size_limit=10,
+        retry=RetryPolicy(attempts=1),
+    )
+
+    client.start()
+
+    with pytest.raises(VkApiError) as error:
+        await client.request("test.fail")
+
+    await client.stop()
+
+    assert error.value.code == 100
+
+@pytest.mark.asyncio
+async def test_request_directly_expired():
+    client = VkClient(
+        "token", session=Session(), code_size_limit=10, rate=1, burst=1, window=0.2,
+    )
+
+    client.start()
+
+    assert await client.request("messages.send", user_id=1) == 7347
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.request("messages.send", user_id=2, timeout=0.05)
+
+    # Request expired while waiting for limiter is not sent
+    await asyncio.sleep(0.3)
+
+    await client.stop()
+
+    assert client.dropped == 1
+    assert len(client._session.calls) == 1
+
+@pytest.mark.asyncio
+async def test_request_split():
+    client = VkClient("token", session=Session(execute_limit=5))
+
+    client.start()
+
+    results = await asyncio.gather(*(
+        client.request("messages.send", user_id=i, message="hey") for i in range(20)
+    ))
 
     await client.stop()
 
+    assert results == [7347] * 20
+    assert client.batch_size < 25
+    assert client.execute_latency > 0
+
+@pytest.mark.asyncio
+async def test_request_overload_single():
+    client = VkClient("token", session=Session(execute_limit=0))
+
+    client.start()
+
+    with pytest.raises(VkApiError) as error:
+        await client.request("messages.send", user_id=1, message="hey")
+
+    await client.stop()
+
+    assert error.value.code == 13
+    assert client.batch_size == 12
+
+@pytest.mark.asyncio
+async def test_request_coalescing():
+    client = VkClient("token", session=Session(), fuse={})
+
+    client.start()
+
+    cancelled = asyncio.ensure_future(client.request("users.get", user_ids=1))
+
+    results = asyncio.gather(
+        client.request("users.get", user_ids=1),
+        client.request("users.get", user_ids=2),
+        client.request("messages.send", user_id=1, message="hey"),
+        client.request("messages.send", user_id=1, message="hey"),
+    )
+
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await results == [[{"id": 1}], [{"id": 2}], 7347, 7347]
+    assert cancelled.cancelled()
+
+    await client.stop()
+
+    assert client.coalesced == 1
+    assert client._inflight == {}
+
+    code = client._session.calls[0][1]["code"]
+
+    assert code.count("API.users.get") == 2
+    assert code.count("API.messages.send") == 2
+
+@pytest.mark.asyncio
+async def test_request_coalescing_priority():
+    client = VkClient("token", session=Session(), rate=1, burst=1, window=0.5)
+
+    # Loop takes first request and waits for limiter
+    client._limiter.drain()
+    client._enqueue(Request("messages.getHistory", {"offset": 0}, -1))
+    client._enqueue(Request("messages.getHistory", {"offset": 1}, -1))
+
+    client.start()
+
+    low = asyncio.ensure_future(client.request("groups.getMembers", group_id=1))
+    await asyncio.sleep(0)
+
+    # Caller with high priority raises priority of shared request
+    high = asyncio.ensure_future(
+        client.request("groups.getMembers", group_id=1, priority=1)
+    )
+    await asyncio.sleep(0)
+
+    assert client.coalesced == 1
+    assert client._queue.qsize() == 2
+
+    request = client._queue.get_nowait()
+
+    assert request.method == "groups.getMembers"
+    assert request.priority == 1
+
+    # Request that is not queued anymore only changes priority
+    client._queue.reprioritize(request, 2)
+    assert request.priority == 2
+    assert client._queue.qsize() == 1
+
+    low.cancel()
+    high.cancel()
+
+    await asyncio.gather(low, high, return_exceptions=True)
+
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_request_fusion():
+    client = VkClient("token", session=Session(), fuse={
+        **FUSIONS, "test.fail": Fusion("user_ids", 10, lambda r, ids: r),
+    })
+
+    client.start()
+
+    results = await asyncio.gather(
+        client.request("users.get", user_ids=1),
+        client.request("users.get", user_ids="2,3"),
+        client.request("users.get", user_ids=[4]),
+        client.request("test.fail", user_ids=1),
+        client.request("test.fail", user_ids=2),
+        return_exceptions=True,
+    )
+
+    await client.stop()
+
+    assert results[:3] == [[{"id": 1}], [{"id": 2}, {"id": 3}], [{"id": 4}]]
+    assert results[3].code == results[4].code == 100
+
+    code = client._session.calls[0][1]["code"]
+
+    assert 'API.users.get({"user_ids": "1,2,3,4"})' in code
+    assert code.count("API.test.fail") == 1
+
+@pytest.mark.asyncio
+async def test_broadcast():
+    client = VkClient("token", session=Session())
+
+    client.start()
+
+    progress = []
+
+    results = await client.broadcast(
+        list(range(1, 251)) + [1], message="hey",
+        progress=lambda done, total: progress.append((done, total)),
+    )
+
+    await client.stop()
+
+    assert len(client._session.calls) == 1
+    assert client._session.calls[0][1]["code"].count("API.messages.send") == 3
+
+    assert len(results) == 250
+    assert results[1] == 1
+    assert results[10].code == 7
+
+    assert [total for _, total in progress] == [250] * 3
+    assert progress[-1] == (250, 250)
+
+@pytest.mark.asyncio
+async def test_broadcast_fail():
+    client = VkClient("token", session=Session(execute_fail=True))
+
+    client.start()
+
+    results = await client.broadcast([1, 2], message="hey")
+
+    await client.stop()
+
+    assert results[1].code == results[2].code == 0
+
+@pytest.mark.asyncio
+async def test_broadcast_priority():
+    client = VkClient("token", session=Session())
+
+    for i in range(30):
+        client._enqueue(Request("messages.getHistory", {"offset": i}, -1))
+
+    client.start()
+
+    results = await client.broadcast([1, 2], message="hey", priority=1)
+
+    await client.stop()
+
+    assert results == {1: 1, 2: 1}
+    assert client._session.calls[0][1]["code"].startswith("return [API.messages.send(")
+
+@pytest.mark.asyncio
+async def test_request_queue(event_loop):
+    queue = RequestQueue(ratio=3.0)
+
+    queue.put_nowait(Request("low", {}, -1))
+    queue.put_nowait(Request("normal", {}))
+    queue.put_nowait(Request("high", {}, 1))
+    queue.put_nowait(Request("normal2", {}))
+
+    assert queue.qsize() == 4
+    assert [queue.get_nowait().method for _ in range(4)] == [
+        "high", "normal", "normal2", "low",
+    ]
+
+    with pytest.raises(asyncio.QueueEmpty):
+        queue.get_nowait()
+
+    # Requests with low priority get every tenth turn (3 ** 2 to 1)
+    for i in range(20):
+        queue.put_nowait(Request("high", {}, 1))
+        queue.put_nowait(Request("low", {}, -1))
+
+    methods = [queue.get_nowait().method for _ in range(20)]
+
+    assert methods.count("low") == 2
+    assert methods[0] == "high"
+
+    while not queue.empty():
+        queue.get_nowait()
+
+    getter = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0)
+
+    request = Request("a", {})
+    queue.put_nowait(request)
+
+    assert await getter is request
+    assert queue.empty()
+
+@pytest.mark.asyncio
+async def test_request_queue_backlog(event_loop):
+    queue = RequestQueue()
+    now = event_loop.time()
+
+    for i in range(1000):
+        queue.put_nowait(Request("low", {"offset": i}, -1))
+
+    queue.get_nowait()
+
+    # New request with high priority doesn't wait for old backlog
+    event_loop.time = lambda: now + 3
+    queue.put_nowait(Request("high", {}, 1))
+    del event_loop.time
+
+    assert queue.get_nowait().method == "high"
+    assert queue.get_nowait().arguments == {"offset": 1}
+
+@pytest.mark.asyncio
+async def test_request_priority_backlog():
+    client = VkClient("token", session=Session())
+
+    for i in range(100):
+        client._enqueue(Request("messages.getHistory", {"offset": i}, -1))
+
+    client.start()
+
+    while not client._session.calls:
+        await asyncio.sleep(0.01)
+
+    # Reply requested after backlog is sent with the next batch
+    assert await client.request("messages.send", user_id=1, message="hey") == 7347
+
+    await client.stop()
+
+    assert "API.messages.send(" in client._session.calls[1][1]["code"]
+
+@pytest.mark.asyncio
+async def test_request_queue_cancel():
+    queue = RequestQueue()
+
+    first = asyncio.ensure_future(queue.get())
+    second = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0)
+
+    request = Request("a", {})
+    queue.put_nowait(request)
+    first.cancel()
+
+    assert await second is request
+
+@pytest.mark.asyncio
+async def test_request_priority():
+    client = VkClient("token", session=Session())
+
+    for i in range(30):
+        client._enqueue(Request("messages.getHistory", {"offset": i}, -1))
+
+    client.start()
+
+    results = await asyncio.gather(
+        client.request("messages.send", user_id=1, message="hey"),
+        client.request("groups.getMembers", group_id=1, priority=2),
+    )
+
+    await client.stop()
+
+    assert results == [7347, 7347]
+
+    code = client._session.calls[0][1]["code"]
+
+    assert code.startswith("return [API.groups.getMembers(")
+    assert "API.messages.send" in code
+
+@pytest.mark.asyncio
+async def test_request_timeout():
+    client = VkClient("token", session=Session(), rate=1, burst=1, window=0.2)
+
+    client.start()
+
+    assert await client.request("messages.send", user_id=1, message="hey") == 7347
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.request("messages.send", user_id=2, message="hey", timeout=0.05)
+
+    expired = Request("messages.send", {}, deadline=client._loop.time())
+    client._enqueue(expired)
+
+    # Request that was never sent
+    with pytest.raises(asyncio.TimeoutError):
+        await expired
+
+    results = await asyncio.gather(
+        client.request("users.get", user_ids=1, timeout=0.01),
+        client.request("users.get", user_ids=1, timeout=0.02),
+        return_exceptions=True,
+    )
+
+    assert await client.request("users.get", user_ids=1, timeout=1) == [{"id": 1}]
+
+    await client.stop()
+
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    assert client.dropped == 3
+    assert len(client._session.calls) == 2
+
+@pytest.mark.asyncio
+async def test_request_cancelled():
+    client = VkClient("token", session=Session())
+
+    client.start()
+
+    task = asyncio.ensure_future(client.request("messages.send", user_id=1))
+    await asyncio.sleep(0)
+    task.cancel()
+
+    await client.stop()
+
+    assert client.dropped == 1
+    assert not client._session.calls
+
+@pytest.mark.asyncio
+async def test_raw_request_error():
+    client = VkClient("token", session=Session())
+
+    response = await client.raw_request("test.fail")
+
+    assert response is None
+
 @pytest.mark.asyncio
 async def test_raw_request():
     client = VkClient("token", session=Session())
@@ -181,3 +659,119 @@ async def test_longpoll_exception():
     assert updates is None
 
     await client.stop()
+
+@pytest.mark.asyncio
+async def test_request_without_pause():
+    client = VkClient("token", session=Session(), rate=1)
+
+    client.start()
+
+    start = time.monotonic()
+    await client.request("messages.send", user_id=1, message="hey")
+    assert time.monotonic() - start < 0.5
+
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_request_retry():
+    client = VkClient(
+        "token", session=Session(flood=2), retry=RetryPolicy(base=0.01),
+    )
+
+    client.start()
+
+    response = await client.request("messages.send", user_id=1, message="hey")
+
+    assert response == 7347
+    assert len(client._session.calls) == 3
+
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_request_retry_exhausted():
+    client = VkClient(
+        "token", session=Session(flood=5), retry=RetryPolicy(2, base=0.01),
+    )
+
+    client.start()
+
+    with pytest.raises(VkApiError) as error:
+        await client.request("messages.send", user_id=1, message="hey")
+
+    assert error.value.code == 6
+    assert len(client._session.calls) == 2
+
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_request_not_retried():
+    client = VkClient("token", session=Session(), retry=RetryPolicy(base=0.01))
+
+    client.start()
+
+    with pytest.raises(VkApiError):
+        await client.request("test.fail")
+
+    assert len(client._session.calls) == 1
+
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_raw_request_retry():
+    client = VkClient(
+        "token", session=Session(flood=1), retry=RetryPolicy(base=0.01),
+    )
+
+    response = await client.raw_request("messages.send", user_id=1, message="hey")
+
+    assert response == 7347
+    assert len(client._session.calls) == 2
+
+@pytest.mark.asyncio
+async def test_load():
+    client = VkClient("token", session=Session(), rate=10, burst=1)
+
+    assert client.load == 0
+
+    for _ in range(30):
+        client._enqueue(Request("messages.send", {}))
+
+    assert client.pending == 30
+    assert client.load == pytest.approx(0.1, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_load_batch_size():
+    client = VkClient("token", session=Session(), rate=10, burst=1,
+                      sizer=BatchSizer(maximum=10))
+
+    for _ in range(30):
+        client._enqueue(Request("messages.send", {}))
+
+    assert client.batch_size == 10
+    assert client.load == pytest.approx(0.3, abs=0.01)
+    assert len(client.take(30)) == 20
+
+@pytest.mark.asyncio
+async def test_work_stealing():
+    busy = VkClient("token", session=Session())
+    idle = VkClient("token", session=Session())
+
+    busy.set_siblings([busy, idle])
+    idle.set_siblings([busy, idle])
+
+    idle.start()
+
+    requests = [Request("messages.send", {}) for _ in range(60)]
+
+    for request in requests:
+        busy._enqueue(request)
+
+    await asyncio.gather(*requests[:35])
+
+    assert busy.pending == 25
+    assert all(r.result() == 7347 for r in requests[:35])
+    assert not any(r.done() for r in requests[35:])
+    assert not busy._session.calls
+
+    await idle.stop()
@@ -2,8 +2,10 @@
 import asyncio
 import pytest
 
-from vkpore import Vkpore
-from vkpore.events import MessageNew
+from vkpore import Vkpore, VkClient
+from vkpore.vkpore import LONGPOLL_BUFFER, Settings, peer_key
+from vkpore.vkclient import Request
+from vkpore.events import MessageNew, Event
 from .testing_tools import Session
 
 
@@ -25,6 +27,197 @@ def test_no_clients(app):
     assert app.get_client(0) is None
 
 
+def test_unknown_balancing():
+    with pytest.raises(ValueError):
+        Vkpore(["token"], balancing="unknown")
+
+
+def test_settings():
+    settings = Settings(balancing="random")
+
+    app = Vkpore(["token"], settings=settings, ordered=True)
+
+    assert app.settings.balancing == "random"
+    assert app.settings.ordered
+    assert not settings.ordered
+
+    with pytest.raises(TypeError):
+        Vkpore(["token"], balance="random")
+
+    with pytest.raises(ValueError):
+        Vkpore(["token"], settings=Settings(balancing="unknown"))
+
+
+@pytest.mark.parametrize("balancing", ["least_loaded", "two_choices"])
+def test_balancing(event_loop, balancing):
+    app = Vkpore(["token"], balancing=balancing, loop=event_loop)
+
+    busy = VkClient("token", session=Session(), loop=event_loop)
+    idle = VkClient("token", session=Session(), loop=event_loop)
+
+    app._clients[1] = [busy, idle]
+
+    for _ in range(100):
+        busy._enqueue(Request("messages.send", {}))
+
+    assert all(app.get_client(1) is idle for _ in range(10))
+
+
+@pytest.mark.asyncio
+async def test_broadcast(event_loop):
+    app = Vkpore(["token"], loop=event_loop)
+
+    clients = [VkClient("token", session=Session(), loop=event_loop) for _ in range(2)]
+
+    app._clients[1] = clients
+
+    for client in clients:
+        client.start()
+
+    with pytest.raises(ValueError):
+        await app.broadcast(2, [1])
+
+    results = await app.broadcast(1, range(1, 5001), message="hey")
+
+    for client in clients:
+        await client.stop()
+
+
+    assert len(results) == 5000
+    assert all(client._session.calls for client in clients)
+
+
+@pytest.mark.asyncio
+async def test_stream(app):
+    await app.start()
+
+    events = []
+
+    async for event in app.stream(["no"], maxsize=2):
+        events.append(event)
+
+        # Longpoll is paused until events are consumed
+        assert len(app._streams[0]) <= 2
+
+        if len(events) == 6:
+            break
+
+    # Abandoned iterator is closed by event loop
+    await asyncio.sleep(0.01)
+
+    assert not app._streams
+    assert [event.source for event in events] == [1, 2, 3, 1, 2, 3]
+    assert events[0]._app is app
+
+    async def consume():
+        return [event async for event in app.stream(group_ids=[2])]
+
+    consumer = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.01)
+
+    await app.stop()
+
+    assert await consumer == []
+
+
+@pytest.mark.asyncio
+async def test_longpoll_pipeline(event_loop):
+    session = Session()
+    app = Vkpore(["token"], session=session, loop=event_loop, max_running=1)
+
+    release = asyncio.Event()
+
+    @app.on("vk:raw")
+    async def _(_):
+        await release.wait()
+
+    await app.start()
+    await asyncio.sleep(0.3)
+
+    polls = sum(1 for url, _ in session.calls if url == "x.x")
+
+    # Processing is blocked, but next responses are received and buffered
+    assert polls == LONGPOLL_BUFFER + 2
+
+    release.set()
+
+    await app.stop()
+
+
+@pytest.mark.asyncio
+async def test_longpoll_timeout(event_loop, monkeypatch):
+    # Timeouts are handled by longpoll itself, not by reader's fallback
+    monkeypatch.setattr("vkpore.vkpore.LONGPOLL_ERROR_DELAY", 10)
+
+    session = Session(longpoll_failed=asyncio.TimeoutError())
+    app = Vkpore(["token"], session=session, loop=event_loop)
+
+    complete = asyncio.Event()
+
+    @app.on("vk:raw")
+    async def _(_):
+        complete.set()
+
+    await app.start()
+
+    while sum(1 for url, _ in session.calls if url == "x.x") < 2:
+        await asyncio.sleep(0.01)
+
+    # Receiving continues after server recovers
+    session.longpoll_failed = 0
+
+    await asyncio.wait_for(complete.wait(), 2)
+
+    assert not app._loops[0].done()
+
+    await app.stop()
+
+
+@pytest.mark.asyncio
+async def test_longpoll_reader_errors(monkeypatch):
+    monkeypatch.setattr("vkpore.vkpore.LONGPOLL_ERROR_DELAY", 0)
+
+    responses = [RuntimeError, [{"type": "no", "object": 1}]]
+
+    class Receiver:
+        state = {}
+
+        async def __call__(self):
+            response = responses.pop(0) if responses else None
+
+            if isinstance(response, type):
+                raise response()
+
+            await asyncio.sleep(0)
+
+            return response
+
+    queue = asyncio.Queue()
+    reader = asyncio.ensure_future(Vkpore._read_updates(Receiver(), queue))
+
+    # Unexpected error is logged and receiving continues
+    assert await asyncio.wait_for(queue.get(), 1) == ([{"type": "no", "object": 1}], {})
+
+    reader.cancel()
+
+
+@pytest.mark.asyncio
+async def test_longpoll_reader_stopped(app):
+    async def read_updates(*_):
+        raise ValueError
+
+    app._read_updates = read_updates
+
+    await app.start()
+
+    # Stopped reader stops the loop instead of leaving it waiting forever
+    await asyncio.wait(app._loops, timeout=1)
+
+    assert isinstance(app._loops[0].exception(), ValueError)
+
+    await app.stop()
+
+
 @pytest.mark.asyncio
 async def test_no_callbakcs(app):
     events = []
@@ -56,7 +249,125 @@ async def test_longpoll(app):
     await app.stop()
 
     assert events
-    assert sorted(e.source for e in events) == [1, 2, 3]
+    assert sorted(set(e.source for e in events)) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_longpoll_backpressure(event_loop):
+    app = Vkpore(["token"], session=Session(), loop=event_loop, max_running=1)
+
+    release = asyncio.Event()
+    running = []
+
+    @app.on("vk:raw")
+    async def _(event):
+        running.append(app._dispatcher.running)
+        await release.wait()
+
+    await app.start()
+
+    while not running:
+        await asyncio.sleep(0.01)
+
+    await asyncio.sleep(0.05)
+
+    assert running == [1]
+
+    release.set()
+
+    await app.stop()
+
+    assert max(running) == 1
+    assert app._dispatcher.running == 0
+
+
+@pytest.mark.asyncio
+async def test_ordered(event_loop):
+    app = Vkpore(["token"], loop=event_loop, ordered=True)
+
+    handled = []
+
+    @app.on("vk:message_new")
+    async def _(event):
+        await asyncio.sleep(0.02 if event.text == "slow" else 0)
+        handled.append((event.peer_id, event.text))
+
+    updates = [
+        {"type": "message_new", "object": {"peer_id": peer_id, "text": text}}
+        for peer_id, text in ((1, "slow"), (1, "fast"), (2, "fast"))
+    ]
+
+    app._stopped.clear()
+
+    await app.process_updates(1, updates)
+    await app._dispatcher.join()
+
+    assert handled == [(2, "fast"), (1, "slow"), (1, "fast")]
+    assert peer_key(MessageNew(1, {})) is None
+
+
+@pytest.mark.asyncio
+async def test_longpoll_skipped(app):
+    await app.start()
+
+    while app.skipped < 3:
+        await asyncio.sleep(0.01)
+
+    await app.stop()
+
+    assert app._dispatcher.running == 0
+
+
+@pytest.mark.asyncio
+async def test_register_event(app):
+    class EventNo(Event):
+        def __init__(self, group_id, source):
+            super().__init__("vk:no", group_id, source)
+
+    app.register_event("no", EventNo)
+
+    complete = asyncio.Event()
+    events = []
+
+    @app.on("vk:no")
+    async def _(event):
+        events.append(event)
+        complete.set()
+
+    await app.start()
+    await complete.wait()
+    await app.stop()
+
+    assert all(isinstance(e, EventNo) for e in events)
+
+
+@pytest.mark.asyncio
+async def test_raw_fallback(app):
+    raw = []
+    typed = []
+
+    @app.on("vk:raw")
+    async def _(event):
+        raw.append(event)
+
+    @app.on("vk:message_new")
+    async def _(event):
+        typed.append(event)
+
+    app._stopped.clear()
+
+    # Updates without callbacks for their classes are still received raw
+    await app.process_updates(1, [
+        {"type": "wall_post_new", "object": {"id": 1}},
+        {"type": "message_new", "object": {"id": 2}},
+        {"type": "unknown", "object": {"id": 3}},
+    ])
+    await app._dispatcher.join()
+
+    assert [(event.name, event.source["id"]) for event in raw] == [
+        ("vk:raw", 1), ("vk:raw", 3),
+    ]
+    assert [event.id for event in typed] == [2]
 
 
 MESSAGE_SOURCE = {
@@ -0,0 +1,139 @@
+# pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import asyncio
+import pytest
+
+from aiohttp import ClientSession
+
+from vkpore import Vkpore
+from vkpore.emulator import Emulator, message_new
+from vkpore.webhook import CallbackReceiver
+
+
+@pytest.fixture
+async def receiver():
+    emulator = Emulator()
+    await emulator.start()
+
+    app = Vkpore(["token"], api_url=emulator.api_url, longpoll=False)
+    receiver = CallbackReceiver(app, secret="secret")
+
+    await app.start()
+    host, port = await receiver.start("127.0.0.1", 0)
+
+    receiver.url = "http://{}:{}/".format(host, port)
+
+    yield receiver
+
+    await receiver.stop()
+    await app.stop()
+    await emulator.stop()
+
+    assert emulator.calls["groups.setLongPollSettings"] == 0
+    assert emulator.calls["groups.getLongPollServer"] == 0
+
+
+async def post(receiver, **body):
+    async with ClientSession() as session:
+        async with session.post(receiver.url, json=body) as response:
+            return response.status, await response.text()
+
+
+@pytest.mark.asyncio
+async def test_confirmation(receiver):
+    body = {"type": "confirmation", "group_id": 1, "secret": "secret"}
+
+    assert await post(receiver, **body) == (200, "confirm1")
+
+    receiver.confirmations[1] = "code"
+
+    assert await post(receiver, **body) == (200, "code")
+
+
+@pytest.mark.asyncio
+async def test_rejected(receiver):
+    update = message_new(1)
+
+    assert (await post(receiver, **update, group_id=1, secret="wrong"))[0] == 403
+    assert (await post(receiver, **update, group_id=2, secret="secret"))[0] == 404
+    assert (await post(receiver, **update, secret="secret"))[0] == 400
+
+
+@pytest.mark.asyncio
+async def test_updates(receiver):
+    received = []
+
+    @receiver.app.on("vk:message_new")
+    async def _(event):
+        await asyncio.sleep(0.01)
+        received.append(event.text)
+
+    for number in (1, 2, 2, 3):
+        result = await post(
+            receiver, **message_new(number), group_id=1, secret="secret",
+            event_id="event{}".format(number),
+        )
+
+        assert result == (200, "ok")
+
+    await receiver.join()
+    await receiver.app._dispatcher.join()
+
+    # Repeated delivery is skipped
+    assert received == ["message 1", "message 2", "message 3"]
+
+
+class Request:  # pylint: disable=too-few-public-methods
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self):
+        return self.body
+
+
+@pytest.mark.asyncio
+async def test_cancelled_while_queue_is_full():
+    emulator = Emulator()
+    await emulator.start()
+
+    app = Vkpore(["token"], api_url=emulator.api_url, longpoll=False, max_running=1)
+    receiver = CallbackReceiver(app, maxsize=1)
+
+    release = asyncio.Event()
+    received = []
+
+    @app.on("vk:message_new")
+    async def _(event):
+        await release.wait()
+        received.append(event.text)
+
+    await app.start()
+
+    def request(number):
+        return Request({**message_new(number), "group_id": 1, "event_id": str(number)})
+
+    # First update is handled, second waits for it and third fills queue
+    for number in (1, 2, 3):
+        response = await receiver.handle(request(number))
+        assert response.text == "ok"
+        await asyncio.sleep(0.01)
+
+    # Vkontakte disconnects while waiting for acknowledgement
+    handler = asyncio.ensure_future(receiver.handle(request(4)))
+    await asyncio.sleep(0.01)
+    handler.cancel()
+    await asyncio.gather(handler, return_exceptions=True)
+
+    release.set()
+
+    # Repeated delivery is not skipped
+    response = await receiver.handle(request(4))
+    assert response.text == "ok"
+
+    await receiver.join()
+    await app._dispatcher.join()
+
+    await receiver.stop()
+    await app.stop()
+    await emulator.stop()
+
+    assert received == ["message {}".format(n) for n in range(1, 5)]
@@ -1,13 +1,25 @@
 # pylint: disable=missing-docstring,protected-access,redefined-outer-name
+import json
+
 from async_generator import asynccontextmanager
 
 
+FAIL_ERROR = {"error_code": 100, "error_msg": "One of the parameters is invalid"}
+
+FLOOD_ERROR = {"error_code": 6, "error_msg": "Too many requests per second"}
+
+OVERLOAD_ERROR = {"error_code": 13, "error_msg": "Response size is too big"}
+
+
 class Session:
-    def __init__(self, exception=None, execute_fail=False, longpoll_failed=0):
+    def __init__(self, exception=None, execute_fail=False, longpoll_failed=0, flood=0,
+                 execute_limit=None):
         self.calls = []
         self.exception = exception
         self.execute_fail = execute_fail
         self.longpoll_failed = longpoll_failed
+        self.flood = flood
+        self.execute_limit = execute_limit
 
     async def close(self):
         pass
@@ -44,15 +56,46 @@ class Session:
 
                 response = None
 
+                if self.flood:
+                    self.flood -= 1
+                    return {"error": FLOOD_ERROR}
+
+                if url.endswith("test.fail"):
+                    return {"error": FAIL_ERROR}
+
+                if url.endswith("execute") and self.execute_limit is not None:
+                    if data["code"].count("API.") > self.execute_limit:
+                        return {"error": OVERLOAD_ERROR}
+
                 if url.endswith("execute") and not self.execute_fail:
                     response = []
+                    errors = []
 
                     for part in data["code"].split("API")[1:]:
                         if ".groups.getLongPollServer" in part:
                             response.append({"server": "x.x", "key": "x", "ts": 1})
+                        elif part.startswith(".users.get("):
+                            arguments = json.loads(part[len(".users.get("):part.rindex(")")])
+                            response.append([
+                                {"id": int(i)} for i in str(arguments["user_ids"]).split(",")
+                            ])
+                        elif part.startswith(".messages.send(") and "peer_ids" in part:
+                            arguments = json.loads(part[len(".messages.send("):part.rindex(")")])
+                            response.append([
+                                {"peer_id": int(i), "message_id": 1}
+                                if int(i) % 10 else
+                                {"peer_id": int(i), "error": {"code": 7, "description": "No"}}
+                                for i in arguments["peer_ids"].split(",")
+                            ])
+                        elif ".test.fail" in part:
+                            response.append(False)
+                            errors.append({"method": "test.fail", **FAIL_ERROR})
                         else:
                             response.append(7347)
 
+                    if errors:
+                        return {"response": response, "execute_errors": errors}
+
                 elif url.endswith("groups.getById"):
                     response = [{"id": 1, "name": "Group"}]
 
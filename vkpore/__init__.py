@@ -3,7 +3,7 @@
 import logging
 
 from .vkpore import Vkpore
-from .vkclient import VkClient
+from .vkclient import VkClient, VkApiError
 
 
 logging.basicConfig(
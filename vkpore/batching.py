@@ -0,0 +1,317 @@
+"""Module with tools for grouping calls into `execute` requests."""
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+
+from .codec import JsonCodec
+from .utils import Options, call_key
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .scheduling import Request
+
+
+#: Maximum amount of calls in one `execute`
+EXECUTE_LIMIT = 25
+
+#: Maximum size of code for `execute` in bytes (UTF-8). Vkontakte rejects
+#: requests with too long code or body, so some space is left for url
+#: encoding and other arguments.
+CODE_SIZE_LIMIT = 60000
+
+# Size of "return [];"
+_CODE_OVERHEAD = 10
+
+
+def _select(items: Any, key: Callable[[Dict], Any], ids: List[List[str]]) -> List[List]:
+    """Return items for every list of ids, items' ids are taken with `key`."""
+
+    found = {str(key(item)): item for item in items}
+
+    return [[found[i] for i in part if i in found] for part in ids]
+
+
+def _split_items(response: Any, ids: List[List[str]]) -> List[Any]:
+    """Split list of objects with "id" by requested ids."""
+    return _select(response or (), lambda item: item.get("id"), ids)
+
+
+def _split_conversations(response: Any, ids: List[List[str]]) -> List[Any]:
+    """Split response of `messages.getConversationsById` by requested ids."""
+
+    return [
+        {**response, "count": len(items), "items": items}
+        for items in _select(
+            response.get("items", ()), lambda item: item["peer"]["id"], ids
+        )
+    ]
+
+
+class Fusion:  # pylint: disable=too-few-public-methods
+    """
+    Description of method which calls with different ids can be merged into
+    one call. Ids are passed in `argument` (no more than `limit` of them),
+    response is split between calls with `split(response, ids)`, which
+    receives lists of ids for every call and returns list of responses.
+    """
+
+    __slots__ = ("argument", "limit", "split")
+
+    def __init__(self, argument: str, limit: int,
+                 split: Callable[[Any, List[List[str]]], List[Any]]):
+        self.argument: str = argument
+        self.limit: int = limit
+        self.split: Callable[[Any, List[List[str]]], List[Any]] = split
+
+    def ids(self, request: "Union[Request, FusedRequest]") -> Optional[List[str]]:
+        """Return ids from request or None if request can't be merged."""
+
+        value = request.arguments.get(self.argument)
+
+        if isinstance(value, (list, tuple)):
+            ids = [str(i) for i in value]
+        elif isinstance(value, (int, str)):
+            ids = [i.strip() for i in str(value).split(",")]
+        else:
+            return None
+
+        # Screen names are not returned in response, so they can't be split
+        if not ids or not all(i.isdigit() for i in ids):
+            return None
+
+        return ids
+
+
+#: Methods which calls are merged by default
+FUSIONS: Dict[str, Fusion] = {
+    "users.get": Fusion("user_ids", 1000, _split_items),
+    "groups.getById": Fusion("group_ids", 500, _split_items),
+    "messages.getConversationsById": Fusion("peer_ids", 100, _split_conversations),
+}
+
+
+class FusedRequest:  # pylint: disable=too-few-public-methods
+    """Call that is result of merging of requests (`parts`)."""
+
+    __slots__ = ("method", "arguments", "code", "fusion", "parts", "ids")
+
+    def __init__(self, request: "Request", fusion: Fusion, ids: List[str]):
+        self.method: str = request.method
+        self.arguments: Dict[str, Any] = {
+            **request.arguments, fusion.argument: ",".join(ids)
+        }
+        self.code: Optional[bytes] = None
+
+        self.fusion: Fusion = fusion
+        self.parts: List["Request"] = [request]
+        self.ids: List[List[str]] = [ids]
+
+    @property
+    def count(self) -> int:
+        """Amount of ids in merged call."""
+        return sum(len(ids) for ids in self.ids)
+
+    def merge(self, request: "Request", ids: List[str]):
+        """Add request to merged call."""
+
+        self.parts.append(request)
+        self.ids.append(ids)
+
+        self.arguments[self.fusion.argument] += "," + ",".join(ids)
+        self.code = None
+
+    def split(self, response: Any) -> List[Any]:
+        """Return responses for parts."""
+        return self.fusion.split(response, self.ids)
+
+
+class Batch:
+    """
+    Calls for one `execute`. Batch tracks size of it's code and doesn't
+    accept calls after reaching `limit` calls or `size_limit` bytes. Code
+    of every call is built once and stored in request, so it's reused when
+    call is retried.
+
+    Requests of methods from `fusions` with the same arguments except ids
+    are merged into one call (`FusedRequest`) while it has space for ids.
+    """
+
+    __slots__ = (
+        "requests", "size", "codec", "limit", "size_limit", "fusions", "_fused",
+    )
+
+    def __init__(self, codec: JsonCodec, limit: int = EXECUTE_LIMIT,
+                 size_limit: int = CODE_SIZE_LIMIT,
+                 fusions: Optional[Dict[str, Fusion]] = None):
+        #: Calls in batch
+        self.requests: List[Union["Request", FusedRequest]] = []
+        #: Size of batch's code in bytes
+        self.size: int = _CODE_OVERHEAD
+
+        self.codec: JsonCodec = codec
+        self.limit: int = limit
+        self.size_limit: int = size_limit
+        self.fusions: Dict[str, Fusion] = fusions or {}
+
+        self._fused: Dict[str, FusedRequest] = {}
+
+    def prepare(self, request: "Union[Request, FusedRequest]") -> int:
+        """Build code for request if it's not built and return it's size."""
+
+        if request.code is None:
+            request.code = "API.{}({}),".format(
+                request.method, self.codec.dumps(request.arguments)
+            ).encode()
+
+        return len(request.code)
+
+    @property
+    def originals(self) -> List["Request"]:
+        """Requests added to batch (including merged ones)."""
+
+        originals: List["Request"] = []
+
+        for call in self.requests:
+            if isinstance(call, FusedRequest):
+                originals.extend(call.parts)
+            else:
+                originals.append(call)
+
+        return originals
+
+    @property
+    def full(self) -> bool:
+        """True if batch doesn't accept calls anymore."""
+        return len(self.requests) >= self.limit
+
+    def oversized(self, request: "Request") -> bool:
+        """Return True if request can't fit even into empty batch."""
+        return self.prepare(request) + _CODE_OVERHEAD > self.size_limit
+
+    def add(self, request: "Request") -> bool:
+        """Add request to batch. Returns False if it doesn't fit."""
+
+        fusion = self.fusions.get(request.method)
+        ids = None if fusion is None else fusion.ids(request)
+
+        if fusion is None or ids is None:
+            return self._add(request)
+
+        arguments = dict(request.arguments)
+        del arguments[fusion.argument]
+
+        key = call_key(request.method, arguments)
+        fused = self._fused.get(key)
+
+        # Size of ids with separators
+        size = sum(len(i) for i in ids) + len(ids)
+
+        if (fused is not None and fused.count + len(ids) <= fusion.limit
+                and self.size + size <= self.size_limit):
+            fused.merge(request, ids)
+            self.size += size
+            return True
+
+        fused = FusedRequest(request, fusion, ids)
+
+        if not self._add(fused):
+            return False
+
+        self._fused[key] = fused
+
+        return True
+
+    def _add(self, call: "Union[Request, FusedRequest]") -> bool:
+        size = self.prepare(call)
+
+        if self.full or self.size + size > self.size_limit:
+            return False
+
+        self.requests.append(call)
+        self.size += size
+
+        return True
+
+    def code(self) -> str:
+        """Return code for `execute` that performs batch's calls."""
+
+        codes: List[bytes] = []
+
+        for request in self.requests:
+            self.prepare(request)
+            assert request.code is not None
+            codes.append(request.code)
+
+        return "return [" + b"".join(codes).decode() + "];"
+
+
+#: Codes of errors of `execute` that mean batch was too heavy: runtime
+#: error (execution timeout, too big response, etc.)
+OVERLOAD_CODES = (13,)
+
+
+class SizerOptions(Options):  # pylint: disable=too-few-public-methods
+    """Options of `BatchSizer` (see it's description)."""
+
+    #: Minimum amount of calls in one `execute`
+    minimum: int = 1
+    #: Maximum (and initial) amount of calls in one `execute`
+    maximum: int = EXECUTE_LIMIT
+    #: Growth of size after fast `execute`
+    increase: float = 1.0
+    #: Multiplier of size after slow or overloaded `execute`
+    decrease: float = 0.5
+    #: Maximum latency of fast `execute` in seconds
+    target: float = 1.0
+    #: Weight of new latency in it's moving average
+    smoothing: float = 0.2
+
+
+class BatchSizer:
+    """
+    Controller of amount of calls in one `execute` (AIMD). Size grows by
+    `increase` after every `execute` that took no more than `target`
+    seconds and is multiplied by `decrease` after slower `execute` or
+    overload (see `OVERLOAD_CODES`). Size stays between `minimum` and
+    `maximum` and starts at `maximum`. Latency is smoothed with
+    exponential moving average with weight `smoothing`. Options are passed
+    as `SizerOptions` or as keyword arguments.
+    """
+
+    __slots__ = ("options", "_size", "_latency")
+
+    def __init__(self, options: Optional[SizerOptions] = None, **changes):
+        self.options: SizerOptions = (options or SizerOptions()).replace(**changes)
+
+        self._size: float = self.options.maximum
+        self._latency: float = 0.0
+
+    @property
+    def size(self) -> int:
+        """Current amount of calls for one `execute`."""
+        return int(self._size)
+
+    @property
+    def latency(self) -> float:
+        """Smoothed latency of successful `execute` in seconds."""
+        return self._latency
+
+    def success(self, latency: float):
+        """Update size after `execute` that took `latency` seconds."""
+
+        options = self.options
+
+        if self._latency:
+            self._latency += options.smoothing * (latency - self._latency)
+        else:
+            self._latency = latency
+
+        if latency <= options.target:
+            self._size = min(options.maximum, self._size + options.increase)
+        else:
+            self._shrink()
+
+    def overload(self):
+        """Update size after `execute` failed because batch was too heavy."""
+        self._shrink()
+
+    def _shrink(self):
+        self._size = max(self.options.minimum, self._size * self.options.decrease)
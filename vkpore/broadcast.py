@@ -0,0 +1,71 @@
+"""Module with helpers for sending message to many peers."""
+
+from typing import Callable, Dict, Iterable, List, Optional, Union, TYPE_CHECKING
+from random import getrandbits
+import asyncio
+
+from .errors import VkApiError
+from .scheduling import PRIORITY_LOW
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .vkclient import VkClient  # pylint: disable=cyclic-import
+
+
+#: Maximum amount of peers in one call of `messages.send`
+BROADCAST_LIMIT = 100
+
+
+#: Function that receives amount of processed peers and total amount of peers
+Progress = Callable[[int, int], None]
+
+
+async def broadcast(select: Callable[[], "VkClient"], peer_ids: Iterable[int],
+                    progress: Optional[Progress], arguments: Dict
+                    ) -> Dict[int, Union[int, VkApiError]]:
+    """
+    Send message with arguments to peers using `messages.send` with up to
+    `BROADCAST_LIMIT` peers in one call. Client for every call is returned
+    by `select`. Calls have low priority unless "priority" is in arguments.
+    Returns message id or error for every peer.
+    """
+
+    peers: List[int] = list(dict.fromkeys(peer_ids))
+    results: Dict[int, Union[int, VkApiError]] = {}
+
+    # Calls can be retried, so random_id should stay the same
+    arguments = {
+        "random_id": getrandbits(31), "priority": PRIORITY_LOW, **arguments
+    }
+
+    async def send(chunk: List[int]):
+        try:
+            response = await select().request(
+                "messages.send", peer_ids=",".join(map(str, chunk)), **arguments
+            )
+        except VkApiError as error:
+            for peer_id in chunk:
+                results[peer_id] = error
+        else:
+            for item in response:
+                if "error" in item:
+                    results[item["peer_id"]] = VkApiError(
+                        int(item["error"].get("code", 0)),
+                        item["error"].get("description", "Unknown error"),
+                        "messages.send",
+                    )
+                else:
+                    results[item["peer_id"]] = item["message_id"]
+
+            for peer_id in chunk:
+                if peer_id not in results:
+                    results[peer_id] = VkApiError(0, "Empty response", "messages.send")
+
+        if progress is not None:
+            progress(len(results), len(peers))
+
+    await asyncio.gather(*(
+        send(peers[i:i + BROADCAST_LIMIT])
+        for i in range(0, len(peers), BROADCAST_LIMIT)
+    ))
+
+    return results
@@ -0,0 +1,107 @@
+"""
+Module with cache for responses of read-only methods. Responses are stored
+in backend: `MemoryBackend` for storing them in process or your own
+implementation of `CacheBackend` for sharing them (with redis, for example).
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from abc import ABC, abstractmethod
+from time import monotonic
+
+from .utils import call_key
+
+
+# Expiration time and value
+_Entry = Tuple[float, Any]
+
+
+class CacheBackend(ABC):
+    """Storage for cached responses."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return value stored with key or None if it's absent or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        """Store value with key for `ttl` seconds."""
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Backend that stores values in process. It stores no more than
+    `max_entries` values and evicts least recently used ones.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries: int = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[0] <= monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+
+        return entry[1]
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ResponseCache:
+    """
+    Cache for responses of methods. Only responses of methods from `ttl`
+    are cached, each for specified amount of seconds. Cached responses are
+    shared between callers, so they should not be modified.
+    """
+
+    def __init__(self, ttl: Dict[str, float], backend: CacheBackend = None,
+                 max_entries: int = 1024):
+        #: Time to live of responses of methods in seconds
+        self.ttl: Dict[str, float] = ttl
+        #: Backend for storing responses
+        self.backend: CacheBackend = backend or MemoryBackend(max_entries)
+
+        #: Amount of calls answered from cache
+        self.hits: int = 0
+        #: Amount of calls of cached methods that were not found in cache
+        self.misses: int = 0
+
+    def caches(self, method: str) -> bool:
+        """Return True if responses of method are cached."""
+        return method in self.ttl
+
+    async def get(self, method: str, arguments: Dict[str, Any]) -> Optional[Any]:
+        """Return cached response for call or None."""
+
+        response = await self.backend.get(call_key(method, arguments))
+
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return response
+
+    async def set(self, method: str, arguments: Dict[str, Any], response: Any):
+        """Store response for call."""
+
+        if response is not None:
+            await self.backend.set(
+                call_key(method, arguments), response, self.ttl[method]
+            )
@@ -0,0 +1,194 @@
+"""
+Module with storages for longpoll state of groups. `Vkpore` saves state
+(server, key and ts) after dispatching received updates and resumes from
+it on start, so updates that arrived while application was stopped are
+not lost. Use `FileCheckpoint`, `SqliteCheckpoint` or your own
+implementation of `CheckpointStore`.
+"""
+
+from typing import Dict, Optional, Union
+from abc import ABC, abstractmethod
+import asyncio
+import logging
+import sqlite3
+import json
+import os
+
+
+#: State of longpoll: "server", "key" and "ts"
+LongpollState = Dict[str, Union[int, str]]
+
+
+class CheckpointStore(ABC):
+    """Storage for longpoll states of groups."""
+
+    @abstractmethod
+    async def load(self, group_id: int) -> Optional[LongpollState]:
+        """Return saved state for group or None if there is none."""
+
+    @abstractmethod
+    async def save(self, states: Dict[int, LongpollState]):
+        """Save states of groups (other groups' states are kept)."""
+
+
+class FileCheckpoint(CheckpointStore):
+    """
+    Store that keeps states in JSON file at `path`. File is replaced
+    atomically, so it's never left half-written.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+
+    def _read(self) -> Dict[str, LongpollState]:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, states: Dict[int, LongpollState]):
+        data = self._read()
+        data.update((str(group_id), state) for group_id, state in states.items())
+
+        temporary = self.path + ".tmp"
+
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+        os.replace(temporary, self.path)
+
+    async def load(self, group_id: int) -> Optional[LongpollState]:
+        loop = asyncio.get_event_loop()
+        data = await loop.run_in_executor(None, self._read)
+        return data.get(str(group_id))
+
+    async def save(self, states: Dict[int, LongpollState]):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write, states)
+
+
+class SqliteCheckpoint(CheckpointStore):
+    """Store that keeps states in table "longpoll" of sqlite database at `path`."""
+
+    def __init__(self, path: str):
+        self.path: str = path
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS longpoll ("
+            "group_id INTEGER PRIMARY KEY, server TEXT, key TEXT, ts TEXT)"
+        )
+
+        return connection
+
+    def _read(self, group_id: int) -> Optional[LongpollState]:
+        connection = self._connect()
+
+        try:
+            row = connection.execute(
+                "SELECT server, key, ts FROM longpoll WHERE group_id = ?",
+                (group_id,),
+            ).fetchone()
+        finally:
+            connection.close()
+
+        if row is None:
+            return None
+
+        return {"server": row[0], "key": row[1], "ts": row[2]}
+
+    def _write(self, states: Dict[int, LongpollState]):
+        connection = self._connect()
+
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO longpoll VALUES (?, ?, ?, ?)",
+                    [
+                        (group_id, state["server"], state["key"], str(state["ts"]))
+                        for group_id, state in states.items()
+                    ],
+                )
+        finally:
+            connection.close()
+
+    async def load(self, group_id: int) -> Optional[LongpollState]:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._read, group_id)
+
+    async def save(self, states: Dict[int, LongpollState]):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write, states)
+
+
+class Checkpointer:
+    """
+    Debounced writer of states into `store`. States passed to `update` are
+    saved together no more than once in `interval` seconds while writer
+    is running, and on `stop`.
+    """
+
+    def __init__(self, store: CheckpointStore, interval: float = 1.0):
+        #: Storage for states
+        self.store: CheckpointStore = store
+        #: Minimal delay between saves in seconds
+        self.interval: float = interval
+
+        self._pending: Dict[int, LongpollState] = {}
+        self._updated: asyncio.Event = asyncio.Event()
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._writer: Optional[asyncio.Future] = None
+
+    def update(self, group_id: int, state: LongpollState):
+        """Schedule saving state for group."""
+
+        self._pending[group_id] = state
+        self._updated.set()
+
+    async def flush(self):
+        """Save pending states right now."""
+
+        async with self._lock:
+            if not self._pending:
+                return
+
+            states, self._pending = self._pending, {}
+
+            try:
+                await self.store.save(states)
+            except asyncio.CancelledError:
+                self._pending = {**states, **self._pending}
+                raise
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Checkpoint saving")
+
+                # Keep states that were not replaced while saving
+                self._pending = {**states, **self._pending}
+
+    def start(self):
+        """Start saving updated states in background."""
+
+        if self._writer is None:
+            self._writer = asyncio.ensure_future(self._write_loop())
+
+    async def stop(self):
+        """Stop saving in background and save pending states."""
+
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+
+        await self.flush()
+
+    async def _write_loop(self):
+        while True:
+            await self._updated.wait()
+            self._updated.clear()
+
+            # Saving is not interrupted by `stop`, it waits for it instead
+            await asyncio.shield(self.flush())
+            await asyncio.sleep(self.interval)
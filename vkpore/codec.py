@@ -0,0 +1,79 @@
+"""
+Module with JSON codecs used for serializing calls and parsing responses.
+Faster codecs (orjson, ujson) are used only if they are installed.
+"""
+
+from typing import Any, Callable, Dict, Union
+from functools import partial
+import json
+
+
+class JsonCodec:  # pylint: disable=too-few-public-methods
+    """
+    Pair of functions for encoding objects into JSON strings and decoding
+    them back.
+    """
+
+    __slots__ = ("name", "dumps", "loads")
+
+    def __init__(self, name: str, dumps: Callable[[Any], str],
+                 loads: Callable[[Union[str, bytes]], Any]):
+        #: Codec's name
+        self.name: str = name
+        #: Function for encoding
+        self.dumps: Callable[[Any], str] = dumps
+        #: Function for decoding
+        self.loads: Callable[[Union[str, bytes]], Any] = loads
+
+
+def _stdlib() -> JsonCodec:
+    return JsonCodec("json", partial(json.dumps, ensure_ascii=False), json.loads)
+
+
+def _orjson() -> JsonCodec:
+    import orjson  # type: ignore  # pylint: disable=import-error
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()  # pylint: disable=no-member
+
+    return JsonCodec("orjson", dumps, orjson.loads)  # pylint: disable=no-member
+
+
+def _ujson() -> JsonCodec:
+    import ujson  # type: ignore  # pylint: disable=import-error
+
+    dumps = partial(ujson.dumps, ensure_ascii=False, escape_forward_slashes=False)
+    loads: Callable[..., Any] = ujson.loads
+
+    return JsonCodec("ujson", dumps, loads)
+
+
+#: Known codecs in order of preference for "auto"
+CODECS: Dict[str, Callable[[], JsonCodec]] = {
+    "orjson": _orjson,
+    "ujson": _ujson,
+    "json": _stdlib,
+}
+
+
+def get_codec(codec: Union[str, JsonCodec] = "json") -> JsonCodec:
+    """
+    Return codec by name ("json", "orjson", "ujson" or "auto" for the
+    fastest installed one). Instances of `JsonCodec` are returned as is.
+    Raises `ImportError` if requested codec is not installed.
+    """
+
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    if codec == "auto":
+        for factory in CODECS.values():
+            try:
+                return factory()
+            except ImportError:
+                continue
+
+    if codec not in CODECS:
+        raise ValueError("Unknown codec: {}".format(codec))
+
+    return CODECS[codec]()
@@ -0,0 +1,223 @@
+"""Module with classes for controlling execution and delivery of events."""
+
+from typing import (
+    Dict, Set, Tuple, Optional, Awaitable, Iterable, FrozenSet, Deque, Hashable,
+)
+from collections import deque
+from functools import partial
+import asyncio
+from asyncio import AbstractEventLoop as AEL
+
+
+class Dispatcher:
+    """
+    Class for running event handlers. It keeps track of running handlers
+    and forgets them as soon as they are complete. Amount of handlers
+    running at the same time can be limited globally with `limit` and for
+    every event's name with `limit_per_event`. Producers of events should
+    wait for capacity with `wait` before calling `run`.
+
+    Handlers started with the same `key` run one after another in order
+    they were started, handlers with different keys run concurrently.
+    Handler waiting for previous one counts as running. Key is forgotten
+    as soon as it's last handler completes, amount of keys with running
+    handlers can be limited with `limit_keys`.
+    """
+
+    def __init__(self, loop: AEL = None, limit: Optional[int] = None,
+                 limit_per_event: Optional[int] = None,
+                 limit_keys: Optional[int] = None):
+        self._loop: AEL = loop or asyncio.get_event_loop()
+
+        # Limits for all handlers, handlers per event and keys
+        self._limits: Tuple[Optional[int], Optional[int], Optional[int]] = (
+            limit, limit_per_event, limit_keys
+        )
+
+        self._running: Set[asyncio.Future] = set()
+        self._running_per_event: Dict[str, int] = {}
+
+        # Last started handler for every key
+        self._tails: Dict[Hashable, asyncio.Future] = {}
+
+        self._released: asyncio.Event = asyncio.Event()
+
+    @property
+    def running(self) -> int:
+        """Amount of currently running handlers."""
+        return len(self._running)
+
+    def running_for(self, name: str) -> int:
+        """Amount of currently running handlers for event's name."""
+        return self._running_per_event.get(name, 0)
+
+    @property
+    def active_keys(self) -> int:
+        """Amount of keys with running handlers."""
+        return len(self._tails)
+
+    def has_capacity(self, name: str, key: Optional[Hashable] = None) -> bool:
+        """
+        Return True if handler for event's name (and key) can be started
+        now.
+        """
+
+        limit, limit_per_event, limit_keys = self._limits
+
+        if limit is not None and len(self._running) >= limit:
+            return False
+
+        if key is not None and limit_keys is not None and \
+                key not in self._tails and len(self._tails) >= limit_keys:
+            return False
+
+        if limit_per_event is not None and \
+                self._running_per_event.get(name, 0) >= limit_per_event:
+            return False
+
+        return True
+
+    async def wait(self, name: str, key: Optional[Hashable] = None):
+        """Wait until handler for event's name (and key) can be started."""
+
+        while not self.has_capacity(name, key):
+            self._released.clear()
+            await self._released.wait()
+
+    def run(self, name: str, awaitable: Awaitable,
+            key: Optional[Hashable] = None) -> asyncio.Future:
+        """
+        Start handler for event with specified name. If `key` is not None,
+        handler starts after previous handler with the same key completes.
+        """
+
+        handler: Optional[Awaitable] = None
+
+        if key is not None and key in self._tails:
+            handler = awaitable
+            awaitable = _run_after(self._tails[key], handler)
+
+        future = asyncio.ensure_future(awaitable, loop=self._loop)
+
+        # Handler cancelled while waiting for previous one is never started
+        if asyncio.iscoroutine(handler):
+            future.add_done_callback(lambda _: handler.close())  # type: ignore
+
+        self._running.add(future)
+        self._running_per_event[name] = self._running_per_event.get(name, 0) + 1
+
+        if key is not None:
+            self._tails[key] = future
+
+        future.add_done_callback(partial(self._release, name, key))
+
+        return future
+
+    def _release(self, name: str, key: Optional[Hashable], future: asyncio.Future):
+        self._running.discard(future)
+
+        if key is not None and self._tails.get(key) is future:
+            del self._tails[key]
+
+        left = self._running_per_event.get(name, 0) - 1
+
+        if left > 0:
+            self._running_per_event[name] = left
+        else:
+            self._running_per_event.pop(name, None)
+
+        # Exceptions are logged by handlers themselves
+        if not future.cancelled():
+            future.exception()
+
+        self._released.set()
+
+    async def join(self):
+        """Wait for all running handlers to complete."""
+
+        while self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+
+async def _run_after(previous: asyncio.Future, awaitable: Awaitable):
+    """Await `awaitable` after `previous` completes (in any way)."""
+
+    await asyncio.wait([previous])
+
+    return await awaitable
+
+
+class EventStream:
+    """
+    Bounded buffer of events for consumer of `Vkpore.stream`. Accepts
+    events for updates of `types` from groups with `group_ids` (any if
+    None). Producer waits in `put` while buffer has `maxsize` events.
+    """
+
+    def __init__(self, types: Optional[Iterable[str]] = None,
+                 group_ids: Optional[Iterable[int]] = None, maxsize: int = 100):
+        self._types: Optional[FrozenSet[str]] = (
+            None if types is None else frozenset(types)
+        )
+        self._group_ids: Optional[FrozenSet[int]] = (
+            None if group_ids is None else frozenset(group_ids)
+        )
+        self._maxsize: int = maxsize
+
+        self._events: Deque = deque()
+        self._closed: bool = False
+
+        self._readable: asyncio.Event = asyncio.Event()
+        self._writable: asyncio.Event = asyncio.Event()
+        self._writable.set()
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def closed(self) -> bool:
+        """True if stream doesn't accept events anymore."""
+        return self._closed
+
+    def accepts(self, update_type: str, group_id: int) -> bool:
+        """Return True if stream wants events for update's type from group."""
+
+        return (
+            (self._types is None or update_type in self._types)
+            and (self._group_ids is None or group_id in self._group_ids)
+        )
+
+    async def put(self, event):
+        """Add event to buffer, waiting while it's full."""
+
+        while len(self._events) >= self._maxsize and not self._closed:
+            self._writable.clear()
+            await self._writable.wait()
+
+        if self._closed:
+            return
+
+        self._events.append(event)
+        self._readable.set()
+
+    async def get(self):
+        """Return next event or None if stream is closed."""
+
+        while not self._events:
+            if self._closed:
+                return None
+
+            self._readable.clear()
+            await self._readable.wait()
+
+        event = self._events.popleft()
+        self._writable.set()
+
+        return event
+
+    def close(self):
+        """Stop accepting events. Buffered events can still be received."""
+
+        self._closed = True
+        self._readable.set()
+        self._writable.set()
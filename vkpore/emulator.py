@@ -0,0 +1,409 @@
+"""
+Module with local emulator of Vkontakte API and Bots Longpoll API. It can
+be used for testing and load testing bots without network.
+
+Usage: python -m vkpore.emulator [--port 8080] [--events 100] [--latency 0.05]
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import Counter
+from argparse import ArgumentParser
+from time import monotonic, time
+import asyncio
+import logging
+import json
+import re
+
+from aiohttp import web
+
+from .errors import VkApiError
+from .batching import EXECUTE_LIMIT
+from .utils import Options, TokenBucket
+
+
+#: Handler of method: receives call's arguments and returns response or
+#: raises `VkApiError`
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+_CALL = re.compile(r"\s*API\.([\w.]+)\(\s*")
+_CALL_END = re.compile(r"\s*\)\s*(,|$)")
+
+
+def parse_code(code: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Parse code for `execute` in format "return [API.method({...}), ...];"
+    (the one `VkClient` produces) and return list of calls.
+    """
+
+    code = code.strip()
+
+    if not code.startswith("return [") or not code.endswith("];"):
+        raise VkApiError(12, "Unable to compile code", "execute")
+
+    body = code[len("return ["):-len("];")].strip()
+    decoder = json.JSONDecoder()
+
+    calls: List[Tuple[str, Dict[str, Any]]] = []
+    position = 0
+
+    while position < len(body):
+        match = _CALL.match(body, position)
+
+        if match is None:
+            raise VkApiError(12, "Unable to compile code", "execute")
+
+        method, position = match.group(1), match.end()
+
+        if body.startswith(")", position):
+            arguments: Dict[str, Any] = {}
+        else:
+            try:
+                arguments, position = decoder.raw_decode(body, position)
+            except ValueError as error:
+                raise VkApiError(12, "Unable to compile code", "execute") from error
+
+        match = _CALL_END.match(body, position)
+
+        if match is None or not isinstance(arguments, dict):
+            raise VkApiError(12, "Unable to compile code", "execute")
+
+        calls.append((method, arguments))
+        position = match.end()
+
+    return calls
+
+
+def message_new(number: int) -> Dict[str, Any]:
+    """Return "message_new" update for generated event with number."""
+
+    return {
+        "type": "message_new",
+        "object": {
+            "id": number, "date": int(time()), "out": 0,
+            "peer_id": 2000000001 + number % 10, "from_id": 1 + number % 100,
+            "text": "message {}".format(number), "conversation_message_id": number,
+            "fwd_messages": [], "important": False, "random_id": 0,
+            "attachments": [], "is_hidden": False,
+        },
+    }
+
+
+class EmulatorOptions(Options):  # pylint: disable=too-few-public-methods
+    """Options of emulated API (see `Emulator`)."""
+
+    #: Allowed requests per second for every token
+    rate: float = 20
+    #: Delay before answering calls in seconds
+    latency: float = 0.0
+    #: Amount of generated updates per second
+    events_per_second: float = 0.0
+    #: Function that returns generated update by it's number
+    event_factory: Callable[[int], Dict] = message_new
+    #: Maximum time in seconds longpoll request waits for updates
+    longpoll_wait: float = 25.0
+    #: Amount of last updates available in longpoll
+    history: int = 10000
+
+
+class Emulator:  # pylint: disable=too-many-instance-attributes
+    """
+    Local HTTP server that emulates Vkontakte API for one group. Methods are
+    served at "/method/<name>" (including simplified `execute`) and Bots
+    Longpoll API is served at "/longpoll". Point `VkClient` or `Vkpore` to
+    emulator with `api_url=emulator.api_url`.
+
+    Calls are answered after `latency` seconds. Every token can perform
+    no more than `rate` requests per second, other requests fail with error
+    6. Updates of type "message_new" are generated at `events_per_second`
+    rate with `event_factory` (it receives number of update). Updates can
+    also be added with `push`. You can add your own methods to `handlers`.
+    Options are passed as `EmulatorOptions` or as keyword arguments and can
+    be changed in `options` while emulator is running.
+    """
+
+    def __init__(self, group_id: int = 1, group_name: str = "Emulator",
+                 options: Optional[EmulatorOptions] = None, **changes):
+        self.group_id: int = group_id
+        self.group_name: str = group_name
+        self.options: EmulatorOptions = \
+            (options or EmulatorOptions()).replace(**changes)
+
+        #: Methods of emulated API
+        self.handlers: Dict[str, Handler] = {
+            "groups.getById": self._groups_get_by_id,
+            "groups.setLongPollSettings": lambda _: 1,
+            "groups.getLongPollServer": self._groups_get_longpoll_server,
+            "groups.getCallbackConfirmationCode": self._groups_get_confirmation_code,
+            "messages.send": self._messages_send,
+            "users.get": self._users_get,
+        }
+
+        #: Amount of calls for every method (including calls in `execute`)
+        self.calls: Counter = Counter()
+        #: Amount of requests failed with error 6
+        self.flooded: int = 0
+        #: Amount of updates returned from longpoll
+        self.delivered: int = 0
+
+        self._limiters: Dict[str, TokenBucket] = {}
+
+        self._key: str = "key0"
+        self._updates: List[Dict] = []
+        self._first_ts: int = 1
+        self._updated: asyncio.Event = asyncio.Event()
+        self._generated: int = 0
+
+        self._runner: Optional[web.AppRunner] = None
+        self._generator: Optional[asyncio.Future] = None
+        self._url: str = ""
+
+    @property
+    def url(self) -> str:
+        """Base url of running emulator."""
+        return self._url
+
+    @property
+    def api_url(self) -> str:
+        """Template of methods' urls for `VkClient`'s `api_url`."""
+        return self._url + "/method/{method}"
+
+    @property
+    def ts(self) -> int:  # pylint: disable=invalid-name
+        """Longpoll's current "ts" (number of next update)."""
+        return self._first_ts + len(self._updates)
+
+    def push(self, update_type: str, obj: Any):
+        """Add update to longpoll."""
+
+        self._updates.append({
+            "type": update_type, "object": obj, "group_id": self.group_id,
+        })
+
+        if len(self._updates) > self.options.history:
+            excess = len(self._updates) - self.options.history
+            del self._updates[:excess]
+            self._first_ts += excess
+
+        self._updated.set()
+
+    def expire_key(self):
+        """Change longpoll's key so clients receive "failed": 2."""
+        self._key = "key{}".format(int(self._key[3:]) + 1)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start server (on random free port by default) and return url."""
+
+        app = web.Application()
+        app.router.add_route("*", "/method/{method}", self._handle_method)
+        app.router.add_route("*", "/longpoll", self._handle_longpoll)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        self._url = "http://{}:{}".format(*self._runner.addresses[0][:2])
+
+        if self.options.events_per_second > 0:
+            self._generator = asyncio.ensure_future(self._generate())
+
+        logging.info("Emulator is running at %s", self._url)
+
+        return self._url
+
+    async def stop(self):
+        """Stop server and events generation."""
+
+        if self._generator:
+            self._generator.cancel()
+            await asyncio.gather(self._generator, return_exceptions=True)
+            self._generator = None
+
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _generate(self):
+        """Push updates at `events_per_second` rate."""
+
+        started = monotonic()
+
+        while True:
+            await asyncio.sleep(0.01)
+
+            due = int((monotonic() - started) * self.options.events_per_second)
+
+            while self._generated < due:
+                self._generated += 1
+                update = self.options.event_factory(self._generated)
+                self.push(update["type"], update["object"])
+
+    def call(self, method: str, arguments: Dict[str, Any]) -> Any:
+        """Return response for method's call or raise `VkApiError`."""
+
+        self.calls[method] += 1
+
+        handler = self.handlers.get(method)
+
+        if handler is None:
+            raise VkApiError(3, "Unknown method passed", method)
+
+        return handler(arguments)
+
+    def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Return body of response for `execute`."""
+
+        calls = parse_code(str(arguments.get("code", "")))
+
+        if len(calls) > EXECUTE_LIMIT:
+            raise VkApiError(13, "Too many API calls", "execute")
+
+        response: List[Any] = []
+        errors: List[Dict[str, Any]] = []
+
+        for method, call_arguments in calls:
+            try:
+                response.append(self.call(method, call_arguments))
+            except VkApiError as error:
+                response.append(False)
+                errors.append({
+                    "method": method,
+                    "error_code": error.code,
+                    "error_msg": error.message,
+                })
+
+        if errors:
+            return {"response": response, "execute_errors": errors}
+
+        return {"response": response}
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        arguments = {**request.query, **(await request.post())}
+
+        if self.options.latency:
+            await asyncio.sleep(self.options.latency)
+
+        token = arguments.get("access_token", "")
+
+        if token not in self._limiters:
+            self._limiters[token] = TokenBucket(self.options.rate, 1.0, self.options.rate)
+
+        try:
+            if not self._limiters[token].try_acquire():
+                self.flooded += 1
+                raise VkApiError(6, "Too many requests per second", method)
+
+            if method == "execute":
+                self.calls[method] += 1
+                body = self._execute(arguments)
+            else:
+                body = {"response": self.call(method, arguments)}
+        except VkApiError as error:
+            body = {"error": {"error_code": error.code, "error_msg": error.message}}
+
+        return web.json_response(body)
+
+    async def _handle_longpoll(self, request: web.Request) -> web.Response:
+        arguments = {**request.query, **(await request.post())}
+
+        if arguments.get("key") != self._key:
+            return web.json_response({"failed": 2})
+
+        try:
+            ts = int(arguments["ts"])  # pylint: disable=invalid-name
+        except (KeyError, ValueError):
+            return web.json_response({"failed": 1, "ts": self.ts})
+
+        if ts < self._first_ts or ts > self.ts:
+            return web.json_response({"failed": 1, "ts": self.ts})
+
+        if ts == self.ts:
+            wait = min(float(arguments.get("wait", 25)), self.options.longpoll_wait)
+
+            self._updated.clear()
+
+            try:
+                await asyncio.wait_for(self._updated.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+        # History could be trimmed while waiting
+        start = max(ts, self._first_ts) - self._first_ts
+
+        updates = self._updates[start:]
+        self.delivered += len(updates)
+
+        return web.json_response({"ts": self.ts, "updates": updates})
+
+    def _groups_get_by_id(self, _):
+        return [{
+            "id": self.group_id,
+            "name": self.group_name,
+            "screen_name": "club{}".format(self.group_id),
+        }]
+
+    def _groups_get_longpoll_server(self, _):
+        return {"server": self._url + "/longpoll", "key": self._key, "ts": self.ts}
+
+    def _groups_get_confirmation_code(self, _):
+        return {"code": "confirm{}".format(self.group_id)}
+
+    def _messages_send(self, arguments):
+        if arguments.get("peer_ids"):
+            return [
+                {"peer_id": int(peer_id), "message_id": self.calls["messages.send"]}
+                for peer_id in str(arguments["peer_ids"]).split(",")
+            ]
+
+        if not arguments.get("peer_id") and not arguments.get("user_id"):
+            raise VkApiError(100, "One of the parameters specified was missing or invalid")
+
+        return self.calls["messages.send"]
+
+    @staticmethod
+    def _users_get(arguments):
+        user_ids = str(arguments.get("user_ids") or arguments.get("user_id") or "1")
+
+        return [
+            {"id": int(user_id), "first_name": "User", "last_name": user_id.strip()}
+            for user_id in user_ids.split(",")
+        ]
+
+
+def main():  # pragma: no cover
+    """Run emulator until interrupted."""
+
+    parser = ArgumentParser(description="Run emulator of Vkontakte API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--events", type=float, default=0.0,
+                        help="generated updates per second")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="delay before answering calls in seconds")
+    parser.add_argument("--rate", type=float, default=20,
+                        help="allowed requests per second for every token")
+
+    arguments = parser.parse_args()
+
+    emulator = Emulator(
+        rate=arguments.rate,
+        latency=arguments.latency,
+        events_per_second=arguments.events,
+    )
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(emulator.start(arguments.host, arguments.port))
+
+    print("API url:", emulator.api_url)
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        loop.run_until_complete(emulator.stop())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
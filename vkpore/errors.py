@@ -0,0 +1,67 @@
+"""Module with errors of method calls and policy for retrying them."""
+
+from typing import Dict, Iterable
+from random import uniform
+
+
+class VkApiError(Exception):
+    """
+    Error of method call. Code and message are the ones returned by
+    Vkontakte. Code 0 means that call failed without reaching Vkontakte
+    (network error, malformed response, etc.).
+    """
+
+    def __init__(self, code: int, message: str, method: str = ""):
+        super().__init__("[{}] {} ({})".format(code, message, method))
+
+        #: Error code
+        self.code: int = code
+        #: Error message
+        self.message: str = message
+        #: Method that failed
+        self.method: str = method
+
+    @classmethod
+    def from_error(cls, error: Dict, method: str = "") -> "VkApiError":
+        """Create exception from Vkontakte's error object."""
+
+        return cls(
+            int(error.get("error_code", 0)),
+            error.get("error_msg", "Unknown error"),
+            error.get("method", method),
+        )
+
+
+#: Codes of errors that are worth retrying: network errors (0), unknown
+#: error (1), too many requests per second (6) and internal error (10).
+RETRYABLE_CODES = (0, 1, 6, 10)
+
+
+class RetryPolicy:
+    """
+    Policy for retrying failed calls. Call is performed no more than
+    `attempts` times and only retried if error's code is in `codes`. Delay
+    before retry grows exponentially from `base` up to `cap` seconds and is
+    randomized ("full jitter").
+    """
+
+    __slots__ = ("attempts", "base", "cap", "codes")
+
+    def __init__(self, attempts: int = 3, base: float = 0.1, cap: float = 5.0,
+                 codes: Iterable[int] = RETRYABLE_CODES):
+        #: Maximum amount of attempts for one call
+        self.attempts: int = attempts
+        #: Delay before first retry
+        self.base: float = base
+        #: Maximum delay before retry
+        self.cap: float = cap
+        #: Codes of errors that should be retried
+        self.codes: frozenset = frozenset(codes)
+
+    def should_retry(self, error: VkApiError, attempts: int) -> bool:
+        """Return True if call failed with error after attempts should be retried."""
+        return attempts < self.attempts and error.code in self.codes
+
+    def delay(self, attempts: int) -> float:
+        """Return delay before next attempt after specified attempts."""
+        return uniform(0, min(self.cap, self.base * 2 ** (attempts - 1)))
@@ -2,44 +2,50 @@
 
 from typing import List, Dict, Callable, Tuple, Awaitable, Optional
 from random import random
-from abc import ABC
 import logging
 
-from .utils import read_only_properties
-from .objects import Action, Attachment
+from .schema import Schema, field
+from .utils import lazy_property
+from .objects import Action, Attachment, Photo, Wall
 
 
 Callback = Callable[["Event"], Awaitable]
 
-
-_SLOTS: Tuple[str, ...] = ()
+#: Class (or function) creating event from group's id and update's object
+EventFactory = Callable[[int, Dict], "Event"]
 
 
 # ----------------------------------------------------------------------------
 # Basic events
 
 
-@read_only_properties("name", "group_id", "source")
-class Event(ABC):
+_SET = object.__setattr__
+
+
+class Event(Schema):
     """Base class for possible events."""
 
-    __slots__ = (
-        "_app", "_callbacks", "_callbacks_index",
-        "name", "group_id", "source",
-    )
+    __slots__ = ("_app", "_callbacks", "_callbacks_index")
+
+    #: Event's internal name (like "vk:<event's name>")
+    name: str = field(from_source=False)
+
+    #: Event's group id.
+    group_id: int = field(from_source=False)
+    #: Raw object of event.
+    source: Dict = field(from_source=False)
 
     def __init__(self, name: str, group_id: int, source: Dict):
         self._app = None
         self._callbacks: List[Callback] = []
         self._callbacks_index: int = -1
 
-        #: Event's internal name (like "vk:<event's name>")
-        self.name: str = name
+        # Declared attributes are set directly to avoid `__setattr__` checks
+        _SET(self, "name", name)
+        _SET(self, "group_id", group_id)
+        _SET(self, "source", source)
 
-        #: Event's group id.
-        self.group_id = group_id
-        #: Raw object of event.
-        self.source = source
+        self._read_fields(source)
 
     def __str__(self):  # pragma: no cover
         return "<{}[{}] from {}>".format(
@@ -75,61 +81,67 @@ class EventRaw(Event):
         super().__init__("vk:raw", group_id, source)
 
 
-_SLOTS = (
-    "id", "date", "peer_id", "from_id", "text", "random_id",
-    "important", "payload", "out", "attachments", "action", "reply_message",
-    "fwd_messages"
-)
-
-@read_only_properties(*_SLOTS)  #pylint: disable=too-many-instance-attributes
 class MessageData(Event):
     """
-    Class for storing data about personal message in vkontakte.
+    Class for storing data about personal message in vkontakte. Nested
+    objects are created on first access.
     Documentation: https://vk.com/dev/objects/message
     """
 
-    __slots__ = _SLOTS
-
-    def __init__(self, name, group_id, source: Dict):
-        super().__init__(name, group_id, source)
-
-        #: Message id
-        self.id: int = source.get("id", 0)
-        #: Message date in unixtime
-        self.date: int = source.get("date", 0)
-        #: Message peer id
-        self.peer_id: int = source.get("peer_id", 0)
-        #: Message from id
-        self.from_id: int = source.get("from_id", 0)
-        #: Message text if present
-        self.text: str = source.get("text", "")
-        #: Message random id
-        self.random_id: int = source.get("random_id", 0)
-        #: Message important flag
-        self.important: bool = source.get("important", False)
-        #: Message payload
-        self.payload: str = source.get("payload", "")
-        #: Message out flag
-        self.out: bool = source.get("out", False)
-
-        #: Message action if present
-        self.action: Optional["Action"] = None
-        if "action" in source:
-            self.action = Action(source["action"])
-
-        #: Message reply message if present
-        self.reply_message: Optional[MessageData] = None
-        if "reply_message" in source:
-            self.reply_message = MessageData("", 0, source["reply_message"])
-
-        #: Forwarded messages
-        self.fwd_messages: Tuple[MessageData, ...] = tuple(
-            MessageData("", 0, s) for s in source.get("fwd_messages", ())
+    # Linters can't infer that `source` declared with `field` is a dict
+    # pylint: disable=no-member,unsupported-membership-test,unsubscriptable-object
+
+    #: Message id
+    id: int = field(default=0)
+    #: Message date in unixtime
+    date: int = field(default=0)
+    #: Message peer id
+    peer_id: int = field(default=0)
+    #: Message from id
+    from_id: int = field(default=0)
+    #: Message text if present
+    text: str = field(default="")
+    #: Message random id
+    random_id: int = field(default=0)
+    #: Message important flag
+    important: bool = field(default=False)
+    #: Message payload
+    payload: str = field(default="")
+    #: Message out flag
+    out: bool = field(default=False)
+
+    @lazy_property
+    def action(self) -> Optional[Action]:
+        """Message action if present"""
+
+        if "action" in self.source:
+            return Action(self.source["action"])
+
+        return None
+
+    @lazy_property
+    def reply_message(self) -> Optional["MessageData"]:
+        """Message reply message if present"""
+
+        if "reply_message" in self.source:
+            return MessageData("", 0, self.source["reply_message"])
+
+        return None
+
+    @lazy_property
+    def fwd_messages(self) -> Tuple["MessageData", ...]:
+        """Forwarded messages"""
+
+        return tuple(
+            MessageData("", 0, s) for s in self.source.get("fwd_messages", ())
         )
 
-        #: Message attachments
-        self.attachments: Tuple[Attachment, ...] = tuple(
-            Attachment(s) for s in source.get("attachments", ())
+    @lazy_property
+    def attachments(self) -> Tuple[Attachment, ...]:
+        """Message attachments"""
+
+        return tuple(
+            Attachment(s) for s in self.source.get("attachments", ())
         )
 
     async def response(self, message: str):
@@ -143,6 +155,95 @@ class MessageData(Event):
         )
 
 
+class WallPostData(Event):
+    """
+    Class for storing data about post on the wall.
+    Documentation: https://vk.com/dev/objects/post
+    """
+
+    # Linters can't infer that `source` declared with `field` is a dict
+    # pylint: disable=no-member,unsupported-membership-test,unsubscriptable-object
+
+    #: Post id
+    id: int = field(default=0)
+    #: Wall owner id
+    owner_id: int = field(default=0)
+    #: Post author id
+    from_id: int = field(default=0)
+    #: Administrator who published post (if published by group)
+    created_by: int = field(default=0)
+    #: Publication date in unixtime
+    date: int = field(default=0)
+    #: Post text
+    text: str = field(default="")
+    #: Post type ("post", "copy", "reply", "postpone" or "suggest")
+    post_type: str = field(default="")
+
+    @lazy_property
+    def post(self) -> Wall:
+        """Post as wall attachment (with counters, source, etc.)"""
+        return Wall(self.source)
+
+    @property
+    def attachments(self) -> Tuple[Attachment, ...]:
+        """Post attachments"""
+        return self.post.attachments
+
+    @property
+    def copy_history(self) -> Tuple[Wall, ...]:
+        """History of reposts"""
+        return self.post.copy_history
+
+
+class WallReplyData(Event):
+    """
+    Class for storing data about comment on the wall.
+    Documentation: https://vk.com/dev/objects/comment
+    """
+
+    # Linters can't infer that `source` declared with `field` is a dict
+    # pylint: disable=no-member,unsupported-membership-test,unsubscriptable-object
+
+    #: Comment id
+    id: int = field(default=0)
+    #: Comment author id
+    from_id: int = field(default=0)
+    #: Publication date in unixtime
+    date: int = field(default=0)
+    #: Comment text
+    text: str = field(default="")
+    #: Commented post id
+    post_id: int = field(default=0)
+    #: Commented post's wall owner id
+    post_owner_id: int = field(default=0)
+    #: Id of user this comment replies to
+    reply_to_user: int = field(default=0)
+    #: Id of comment this comment replies to
+    reply_to_comment: int = field(default=0)
+
+    @lazy_property
+    def attachments(self) -> Tuple[Attachment, ...]:
+        """Comment attachments"""
+        return tuple(Attachment(s) for s in self.source.get("attachments", ()))
+
+
+class LikeData(Event):
+    """Class for storing data about like or its removal."""
+
+    #: Id of user who liked the object
+    liker_id: int = field(default=0)
+    #: Type of liked object ("post", "comment", "photo", etc.)
+    object_type: str = field(default="")
+    #: Liked object's owner id
+    object_owner_id: int = field(default=0)
+    #: Liked object's id
+    object_id: int = field(default=0)
+    #: Id of post if liked object is comment on the wall
+    post_id: int = field(default=0)
+    #: Id of comment's thread if liked object is reply in the thread
+    thread_reply_id: int = field(default=0)
+
+
 # ----------------------------------------------------------------------------
 # [Vkontakte events](https://vk.com/dev/groups_events)
 
@@ -152,3 +253,269 @@ class MessageNew(MessageData):
 
     def __init__(self, group_id, source: Dict):
         super().__init__("vk:message_new", group_id, source)
+
+
+class MessageReply(MessageData):
+    """Vkontakte "message_reply" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:message_reply", group_id, source)
+
+
+class MessageEdit(MessageData):
+    """Vkontakte "message_edit" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:message_edit", group_id, source)
+
+
+class MessageAllow(Event):
+    """Vkontakte "message_allow" event."""
+
+    #: User who allowed messages
+    user_id: int = field(default=0)
+    #: Parameter "key" from subscription widget
+    key: str = field(default="")
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:message_allow", group_id, source)
+
+
+class MessageDeny(Event):
+    """Vkontakte "message_deny" event."""
+
+    #: User who denied messages
+    user_id: int = field(default=0)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:message_deny", group_id, source)
+
+
+class MessageTypingState(Event):
+    """Vkontakte "message_typing_state" event."""
+
+    #: Typing state (currently only "typing")
+    state: str = field(default="")
+    #: User who is typing
+    from_id: int = field(default=0)
+    #: Receiver of the message
+    to_id: int = field(default=0)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:message_typing_state", group_id, source)
+
+
+class MessageEvent(Event):
+    """Vkontakte "message_event" event (press of callback button)."""
+
+    #: User who pressed the button
+    user_id: int = field(default=0)
+    #: Conversation with the button
+    peer_id: int = field(default=0)
+    #: Event id for `messages.sendMessageEventAnswer`
+    event_id: str = field(default="")
+    #: Button's payload
+    payload: Dict = field(default=dict)
+    #: Id of message with the button in conversation
+    conversation_message_id: int = field(default=0)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:message_event", group_id, source)
+
+
+class PhotoNew(Event):
+    """Vkontakte "photo_new" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:photo_new", group_id, source)
+
+    @lazy_property
+    def photo(self) -> Photo:
+        """New photo"""
+        return Photo(self.source)
+
+
+class WallPostNew(WallPostData):
+    """Vkontakte "wall_post_new" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:wall_post_new", group_id, source)
+
+
+class WallRepost(WallPostData):
+    """Vkontakte "wall_repost" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:wall_repost", group_id, source)
+
+
+class WallReplyNew(WallReplyData):
+    """Vkontakte "wall_reply_new" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:wall_reply_new", group_id, source)
+
+
+class WallReplyEdit(WallReplyData):
+    """Vkontakte "wall_reply_edit" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:wall_reply_edit", group_id, source)
+
+
+class WallReplyRestore(WallReplyData):
+    """Vkontakte "wall_reply_restore" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:wall_reply_restore", group_id, source)
+
+
+class WallReplyDelete(Event):
+    """Vkontakte "wall_reply_delete" event."""
+
+    #: Deleted comment id
+    id: int = field(default=0)
+    #: Wall owner id
+    owner_id: int = field(default=0)
+    #: Commented post id
+    post_id: int = field(default=0)
+    #: User who deleted the comment
+    deleter_id: int = field(default=0)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:wall_reply_delete", group_id, source)
+
+
+class LikeAdd(LikeData):
+    """Vkontakte "like_add" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:like_add", group_id, source)
+
+
+class LikeRemove(LikeData):
+    """Vkontakte "like_remove" event."""
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:like_remove", group_id, source)
+
+
+class GroupJoin(Event):
+    """Vkontakte "group_join" event."""
+
+    #: User who joined
+    user_id: int = field(default=0)
+    #: How user joined ("join", "unsure", "accepted", "approved" or "request")
+    join_type: str = field(default="")
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:group_join", group_id, source)
+
+
+class GroupLeave(Event):
+    """Vkontakte "group_leave" event."""
+
+    #: User who left
+    user_id: int = field(default=0)
+    #: True if user left by himself (not removed by administrator)
+    self: bool = field(bool, False)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:group_leave", group_id, source)
+
+
+class GroupOfficersEdit(Event):
+    """Vkontakte "group_officers_edit" event."""
+
+    #: Administrator who made the change
+    admin_id: int = field(default=0)
+    #: User whose rights changed
+    user_id: int = field(default=0)
+    #: Previous level of rights
+    level_old: int = field(default=0)
+    #: New level of rights
+    level_new: int = field(default=0)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:group_officers_edit", group_id, source)
+
+
+class UserBlock(Event):
+    """Vkontakte "user_block" event."""
+
+    #: Administrator who blocked the user
+    admin_id: int = field(default=0)
+    #: Blocked user
+    user_id: int = field(default=0)
+    #: Unblock date in unixtime (0 if blocked forever)
+    unblock_date: int = field(default=0)
+    #: Reason of blocking
+    reason: int = field(default=0)
+    #: Administrator's comment
+    comment: str = field(default="")
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:user_block", group_id, source)
+
+
+class UserUnblock(Event):
+    """Vkontakte "user_unblock" event."""
+
+    #: Administrator who unblocked the user (if unblocked manually)
+    admin_id: int = field(default=0)
+    #: Unblocked user
+    user_id: int = field(default=0)
+    #: True if user was unblocked because blocking expired
+    by_end_date: bool = field(bool, False)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:user_unblock", group_id, source)
+
+
+class PollVoteNew(Event):
+    """Vkontakte "poll_vote_new" event."""
+
+    #: Poll owner id
+    owner_id: int = field(default=0)
+    #: Poll id
+    poll_id: int = field(default=0)
+    #: Chosen option id
+    option_id: int = field(default=0)
+    #: User who voted
+    user_id: int = field(default=0)
+
+    def __init__(self, group_id, source: Dict):
+        super().__init__("vk:poll_vote_new", group_id, source)
+
+
+# ----------------------------------------------------------------------------
+# Registry
+
+
+#: Event classes for update types of Bots Longpoll API. Event for update
+#: type "<type>" should have name "vk:<type>" and be created with arguments
+#: `(group_id, source)`.
+EVENTS: Dict[str, EventFactory] = {
+    "message_new": MessageNew,
+    "message_reply": MessageReply,
+    "message_edit": MessageEdit,
+    "message_allow": MessageAllow,
+    "message_deny": MessageDeny,
+    "message_typing_state": MessageTypingState,
+    "message_event": MessageEvent,
+    "photo_new": PhotoNew,
+    "wall_post_new": WallPostNew,
+    "wall_repost": WallRepost,
+    "wall_reply_new": WallReplyNew,
+    "wall_reply_edit": WallReplyEdit,
+    "wall_reply_restore": WallReplyRestore,
+    "wall_reply_delete": WallReplyDelete,
+    "like_add": LikeAdd,
+    "like_remove": LikeRemove,
+    "group_join": GroupJoin,
+    "group_leave": GroupLeave,
+    "group_officers_edit": GroupOfficersEdit,
+    "user_block": UserBlock,
+    "user_unblock": UserUnblock,
+    "poll_vote_new": PollVoteNew,
+}
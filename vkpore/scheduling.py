@@ -0,0 +1,181 @@
+"""Module with requests waiting to be sent and their queue."""
+
+from typing import Deque, Dict, Optional, Union
+from collections import deque
+import asyncio
+from asyncio import Future, AbstractEventLoop as AEL
+
+
+#: Priorities of requests. Requests with higher priority are sent first.
+PRIORITY_LOW = -1
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 1
+
+#: Default priorities of methods (other methods have `PRIORITY_NORMAL`).
+#: Replies are sent before other calls and bulk reads are sent last.
+PRIORITIES: Dict[str, int] = {
+    "messages.send": PRIORITY_HIGH,
+    "messages.edit": PRIORITY_HIGH,
+    "messages.sendMessageEventAnswer": PRIORITY_HIGH,
+    "messages.setActivity": PRIORITY_HIGH,
+    "messages.getHistory": PRIORITY_LOW,
+    "messages.getConversations": PRIORITY_LOW,
+    "groups.getMembers": PRIORITY_LOW,
+}
+
+
+class Request(Future):
+    """Request in queue for execution."""
+
+    __slots__ = (
+        "method", "arguments", "attempts", "code", "priority", "deadline",
+        "waiters",
+    )
+
+    def __init__(self, method, arguments, priority: int = PRIORITY_NORMAL,
+                 deadline: Optional[float] = None):
+        super().__init__()
+
+        self.method: str = method
+        self.arguments: Dict[str, Union[str, int]] = arguments
+        self.attempts: int = 0
+        self.priority: int = priority
+        #: Loop's time after which request is not sent
+        self.deadline: Optional[float] = deadline
+
+        # Amount of callers waiting for coalesced request
+        self.waiters: int = 0
+
+        # Code of call for `execute` encoded in UTF-8 (see `Batch`)
+        self.code: Optional[bytes] = None
+
+
+class RequestQueue:
+    """
+    Queue of requests ordered by priority. Requests with the same priority
+    are served in order of arrival. Priorities take turns by smooth
+    weighted round-robin where priority higher by one gets `ratio` times
+    more turns, so new requests with high priority are served almost at
+    once and requests with low priority are still not starved. Has the
+    same interface as `asyncio.Queue`.
+    """
+
+    def __init__(self, ratio: float = 3.0, loop: AEL = None):
+        self.ratio: float = ratio
+
+        self._loop: AEL = loop or asyncio.get_event_loop()
+        self._getters: Deque[Future] = deque()
+        self._size: int = 0
+
+        # Requests and current weight of every priority with requests
+        self._queues: Dict[int, Deque[Request]] = {}
+        self._weights: Dict[int, float] = {}
+
+    def qsize(self) -> int:
+        """Amount of requests in queue."""
+        return self._size
+
+    def empty(self) -> bool:
+        """Return True if queue is empty."""
+        return not self._size
+
+    def put_nowait(self, request: Request):
+        """Put request in queue."""
+
+        requests = self._queues.get(request.priority)
+
+        if requests is None:
+            requests = self._queues[request.priority] = deque()
+            self._weights[request.priority] = 0.0
+
+        requests.append(request)
+        self._size += 1
+
+        self._wakeup_next()
+
+    def reprioritize(self, request: Request, priority: int):
+        """
+        Change priority of request. Queued request is moved to the end of
+        requests with new priority.
+        """
+
+        requests = self._queues.get(request.priority)
+
+        if requests is None or request not in requests:
+            request.priority = priority
+            return
+
+        requests.remove(request)
+        self._size -= 1
+
+        if not requests:
+            del self._queues[request.priority]
+            del self._weights[request.priority]
+
+        request.priority = priority
+
+        self.put_nowait(request)
+
+    def _wakeup_next(self):
+        while self._getters:
+            getter = self._getters.popleft()
+
+            if not getter.done():
+                getter.set_result(None)
+                break
+
+    def get_nowait(self) -> Request:
+        """Return next request or raise `asyncio.QueueEmpty`."""
+
+        if not self._size:
+            raise asyncio.QueueEmpty()
+
+        priority = self._next_priority()
+
+        requests = self._queues[priority]
+        request = requests.popleft()
+        self._size -= 1
+
+        if not requests:
+            del self._queues[priority]
+            del self._weights[priority]
+
+        return request
+
+    def _next_priority(self) -> int:
+        """Return priority which turn it is to be served."""
+
+        if len(self._weights) == 1:
+            return next(iter(self._weights))
+
+        total = 0.0
+
+        for priority in self._weights:
+            weight = self.ratio ** priority
+            self._weights[priority] += weight
+            total += weight
+
+        chosen = max(self._weights, key=lambda p: (self._weights[p], p))
+        self._weights[chosen] -= total
+
+        return chosen
+
+    async def get(self) -> Request:
+        """Wait for request and return it."""
+
+        while not self._size:
+            getter = self._loop.create_future()
+            self._getters.append(getter)
+
+            try:
+                await getter
+            except asyncio.CancelledError:
+                getter.cancel()
+
+                # Pass wakeup to the next getter
+                if not getter.cancelled() and self._size:
+                    self._wakeup_next()
+
+                raise
+
+        return self.get_nowait()
@@ -0,0 +1,158 @@
+"""
+Module with tools for declaring classes which attributes are read from
+Vkontakte objects.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from abc import ABCMeta
+
+from .utils import lazy_property
+
+
+Key = Union[None, str, Tuple[str, ...]]
+
+
+class Field:  # pylint: disable=too-few-public-methods
+    """
+    Description of attribute that is read from source object. Value is
+    taken from source by `key` (attribute's name if None), converted with
+    `converter` and replaced with `default` if it is absent. If `key` is
+    tuple - first present value is used, if `key` contains dots - it is
+    treated as path in nested objects. If `default` is callable - it is
+    called for every instance. Fields with `from_source` set to False are
+    not read from source and should be set in constructor.
+    """
+
+    __slots__ = ("key", "converter", "default", "from_source")
+
+    def __init__(self, converter: Optional[Callable] = None, default: Any = None,
+                 key: Key = None, from_source: bool = True):
+        self.key: Key = key
+        self.converter: Optional[Callable] = converter
+        self.default: Any = default
+        self.from_source: bool = from_source
+
+
+def field(converter: Optional[Callable] = None, default: Any = None,
+          key: Key = None, from_source: bool = True) -> Any:
+    """Return `Field` for using as annotated class attribute."""
+    return Field(converter, default, key, from_source)
+
+
+def _compile_key(key: Union[str, Tuple[str, ...]]) -> str:
+    """Return python expression that reads key from source."""
+
+    if isinstance(key, tuple):
+        return "(" + " or ".join(_compile_key(k) for k in key) + ")"
+
+    path = key.split(".")
+
+    expression = "get({!r})".format(path[0])
+
+    for part in path[1:]:
+        expression = "({} or {{}}).get({!r})".format(expression, part)
+
+    return expression
+
+
+def _compile_reader(cls: type, fields: Dict[str, Field]) -> Callable:
+    """
+    Generate function that reads fields from source object and sets them
+    directly with slots' descriptors (bypassing `__setattr__`).
+    """
+
+    lines = ["def _read_fields(self, source):"]
+    namespace: Dict[str, Any] = {}
+
+    for index, (name, description) in enumerate(fields.items()):
+        if not description.from_source:
+            continue
+
+        if len(lines) == 1:
+            lines.append("    get = source.get")
+
+        for klass in cls.__mro__:
+            if name in klass.__dict__:
+                namespace["_s{}".format(index)] = klass.__dict__[name].__set__
+                break
+
+        namespace["_d{}".format(index)] = description.default
+        namespace["_c{}".format(index)] = description.converter
+
+        default = "_d{}".format(index)
+
+        if callable(description.default):
+            default += "()"
+
+        value = "v"
+
+        if description.converter is not None:
+            value = "_c{}(v)".format(index)
+
+        lines.append("    v = {}".format(_compile_key(description.key or name)))
+        lines.append("    _s{}(self, {} if v is None else {})".format(
+            index, default, value
+        ))
+
+    if len(lines) == 1:
+        lines.append("    pass")
+
+    exec("\n".join(lines), namespace)  # pylint: disable=exec-used
+
+    return namespace["_read_fields"]
+
+
+class SchemaMeta(ABCMeta):
+    """
+    Metaclass for classes with attributes declared with `field`. Declared
+    attributes and slots for `lazy_property` are added to class's
+    `__slots__`, and method `_read_fields(source)` for reading declared
+    attributes from source object is generated.
+    """
+
+    def __new__(cls, name, bases, namespace, **kwargs):
+        fields: Dict[str, Field] = {}
+        slots = list(namespace.get("__slots__", ()))
+
+        for key, value in list(namespace.items()):
+            if isinstance(value, Field):
+                fields[key] = namespace.pop(key)
+                slots.append(key)
+            elif isinstance(value, lazy_property):
+                slots.append(value.slot)
+
+        inherited: Dict[str, Field] = {}
+
+        for base in reversed(bases):
+            inherited.update(getattr(base, "_fields", {}))
+
+        namespace["__slots__"] = tuple(slots)
+        namespace["_fields"] = {**inherited, **fields}
+
+        return super().__new__(cls, name, bases, namespace, **kwargs)
+
+    def __init__(cls, name, bases, namespace, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+
+        # Reader uses slots' descriptors, so it's built for created class
+        cls._read_fields = _compile_reader(cls, cls._fields)
+
+
+class Schema(metaclass=SchemaMeta):  # pylint: disable=too-few-public-methods
+    """
+    Base class for classes with attributes declared with `field`. Declared
+    attributes are read-only.
+    """
+
+    __slots__ = ()
+
+    _fields: Dict[str, Field] = {}
+
+    def _read_fields(self, source: Dict):
+        """Read declared attributes from source object."""
+
+    def __setattr__(self, name, value):
+        if name in self._fields:
+            raise AttributeError("Can't modify '{}'".format(name))
+
+        object.__setattr__(self, name, value)
@@ -0,0 +1,371 @@
+"""
+Module with supervisor for running application in multiple processes, so
+callbacks of CPU-heavy bots are spread between cores.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+import multiprocessing
+import asyncio
+import logging
+import signal
+import queue
+import os
+
+from .utils import Options
+from .vkclient import VkClient, Longpoll
+from .vkpore import Vkpore, LONGPOLL_ERROR_DELAY
+
+
+#: Possible strategies for spreading updates between workers
+SHARDING = ("group", "peer")
+
+# Timeout of blocking waits in workers, so they notice stopping in time
+_POLL_INTERVAL = 0.5
+
+
+def update_peer_id(update: Dict) -> Optional[int]:
+    """Return id of peer update is related to (None if there is none)."""
+
+    obj = update.get("object")
+
+    if not isinstance(obj, dict):
+        return None
+
+    # Message is inside of "message" since 5.103
+    if isinstance(obj.get("message"), dict):
+        obj = obj["message"]
+
+    peer_id = obj.get("peer_id", obj.get("user_id"))
+
+    return peer_id if isinstance(peer_id, int) else None
+
+
+async def _serve(app: Vkpore, stopping: Any, updates: Any):
+    """Run application in worker until supervisor stops it."""
+
+    loop = asyncio.get_event_loop()
+
+    await app.start()
+
+    try:
+        if updates is None:
+            while not await loop.run_in_executor(None, stopping.wait, _POLL_INTERVAL):
+                pass
+
+            return
+
+        while True:
+            try:
+                item = await loop.run_in_executor(
+                    None, updates.get, True, _POLL_INTERVAL
+                )
+            except queue.Empty:
+                continue
+
+            # Supervisor puts None after all updates when it's stopping
+            if item is None:
+                return
+
+            await app.process_updates(*item)
+    finally:
+        await app.stop()
+
+
+def _work(factory: Callable[..., Vkpore], options: Dict[str, Any],
+          stopping: Any, updates: Any):
+    """Entry point of worker process."""
+
+    # Worker is stopped by supervisor, not by Ctrl+C in terminal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        loop.run_until_complete(_serve(factory(**options), stopping, updates))
+    finally:
+        loop.close()
+
+
+class SupervisorOptions(Options):  # pylint: disable=too-few-public-methods
+    """Options of `Supervisor` (see it's description)."""
+
+    #: Seconds before crashed worker is restarted
+    restart_delay: float = 1.0
+    #: Seconds to wait for worker to stop before terminating it
+    stop_timeout: float = 10.0
+    #: Maximum amount of updates buffered for every worker
+    queue_size: int = 1000
+    #: Context from `multiprocessing.get_context` (default if None)
+    context: Any = None
+    #: Requests per second for every token in total with "peer" sharding
+    rate: float = 19
+
+
+class Supervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Runner of application in `workers` processes (amount of cores by
+    default). Application is created in every worker with `factory`, which
+    receives keyword arguments for `Vkpore` that it has to pass along.
+
+    With `sharding` "group", every worker receives updates for it's own
+    part of groups (by `group_id`). With "peer", updates are received by
+    supervisor and are sent to workers by `peer_id`, so updates from one
+    chat are always handled by the same worker. Up to `queue_size` updates
+    are buffered for every worker. Workers share tokens with "peer"
+    sharding, so requests of every token are limited to `rate` per second
+    in total (see `VkClient`).
+
+    Options `restart_delay`, `stop_timeout`, `queue_size`, `context` and
+    `rate` are passed as `SupervisorOptions` or as keyword arguments.
+
+    Workers that exit unexpectedly are restarted after `restart_delay`
+    seconds. On `stop`, workers finish processing received updates and
+    stop their applications, workers that don't exit in `stop_timeout`
+    seconds (or that can't be told to stop in that time) are terminated.
+
+    .. code-block:: python
+
+        def create_app(**options):
+            app = Vkpore(["token"], **options)
+
+            @app.on("vk:message_new")
+            async def _(event):
+                ...
+
+            return app
+
+        if __name__ == "__main__":
+            Supervisor(create_app, workers=4).run()
+
+    `factory` should be a module level function, so it can be passed to
+    processes started with "spawn" (see `context`).
+    """
+
+    def __init__(self, factory: Callable[..., Vkpore], workers: Optional[int] = None,
+                 sharding: str = "group",
+                 options: Optional[SupervisorOptions] = None, **changes):
+        if sharding not in SHARDING:
+            raise ValueError("Unknown sharding strategy: {}".format(sharding))
+
+        self.factory: Callable[..., Vkpore] = factory
+        self.workers: int = workers or os.cpu_count() or 1
+        self.sharding: str = sharding
+        self.options: SupervisorOptions = \
+            (options or SupervisorOptions()).replace(**changes)
+
+        #: Amount of restarts of crashed workers
+        self.restarts: int = 0
+
+        # Stubs don't describe `Process` of contexts returned by
+        # `multiprocessing.get_context`
+        self._context: Any = self.options.context or multiprocessing.get_context()
+        self._stopping = self._context.Event()
+
+        self._queues: List[Any] = []
+
+        if sharding == "peer":
+            self._queues = [
+                self._context.Queue(self.options.queue_size)
+                for _ in range(self.workers)
+            ]
+
+        self._processes: List[Optional[multiprocessing.Process]] = \
+            [None] * self.workers
+
+        self._app: Optional[Vkpore] = None
+        self._tasks: List[asyncio.Future] = []
+
+    @property
+    def processes(self) -> List[Optional[multiprocessing.Process]]:
+        """Current processes of workers."""
+        return list(self._processes)
+
+    def _options(self, index: int) -> Dict[str, Any]:
+        """Return keyword arguments for application of worker with index."""
+
+        if self.sharding == "group":
+            return {"shard": (index, self.workers)}
+
+        return {"longpoll": False, "rate": self.options.rate / self.workers}
+
+    def _spawn(self, index: int):
+        """Start process of worker with index."""
+
+        updates = self._queues[index] if self.sharding == "peer" else None
+
+        process = self._context.Process(
+            target=_work,
+            args=(self.factory, self._options(index), self._stopping, updates),
+            name="vkpore-worker-{}".format(index),
+            daemon=True,
+        )
+
+        process.start()
+
+        self._processes[index] = process
+
+        logging.info("Started worker %s (pid %s)", index, process.pid)
+
+    async def start(self):
+        """Start workers (and receiving of updates with "peer" sharding)."""
+
+        self._stopping.clear()
+
+        for index in range(self.workers):
+            self._spawn(index)
+
+        self._tasks.append(asyncio.ensure_future(self._watch()))
+
+        if self.sharding == "peer":
+            # Supervisor only receives updates, workers call methods
+            self._app = app = self.factory(longpoll=False)
+
+            await app.start()
+
+            for group_id in app.group_ids:
+                client = app.get_client(group_id)
+
+                await client.enable_longpoll()
+
+                self._tasks.append(
+                    asyncio.ensure_future(self._route(group_id, client))
+                )
+
+    async def _watch(self):
+        """Restart workers that exited while supervisor is running."""
+
+        while True:
+            await asyncio.sleep(_POLL_INTERVAL)
+
+            for index, process in enumerate(self._processes):
+                if process is None or process.is_alive():
+                    continue
+
+                logging.error(
+                    "Worker %s (pid %s) exited with code %s",
+                    index, process.pid, process.exitcode,
+                )
+
+                self._processes[index] = None
+                self.restarts += 1
+
+                asyncio.ensure_future(self._restart(index))
+
+    async def _restart(self, index: int):
+        await asyncio.sleep(self.options.restart_delay)
+
+        if not self._stopping.is_set() and self._processes[index] is None:
+            self._spawn(index)
+
+    async def _route(self, group_id: int, client: VkClient):
+        """
+        Receive updates for group and send them to workers by peer until
+        cancelled. Unexpected errors are logged and receiving continues
+        after `LONGPOLL_ERROR_DELAY` seconds with refreshed longpoll server.
+        """
+
+        get_updates: Longpoll = client.longpoll()
+
+        while True:
+            try:
+                updates = await get_updates()
+
+                if updates:
+                    await self._send(group_id, updates)
+            except Exception as error:  # pylint: disable=broad-except
+                if isinstance(error, asyncio.CancelledError):
+                    raise
+
+                logging.exception("Routing updates")
+                await asyncio.sleep(LONGPOLL_ERROR_DELAY)
+
+                get_updates.server = ""
+
+    async def _send(self, group_id: int, updates: List[Dict]):
+        """Send updates of group to workers by peer."""
+
+        loop = asyncio.get_event_loop()
+
+        parts: Dict[int, List[Dict]] = {}
+
+        for update in updates:
+            peer_id = update_peer_id(update)
+            index = (group_id if peer_id is None else peer_id) % self.workers
+            parts.setdefault(index, []).append(update)
+
+        for index, part in parts.items():
+            await loop.run_in_executor(
+                None, self._queues[index].put, (group_id, part)
+            )
+
+    async def stop(self):
+        """Stop receiving updates and wait for workers to stop."""
+
+        logging.info("Stopping workers")
+
+        self._stopping.set()
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        if self._app is not None:
+            await self._app.stop()
+            self._app = None
+
+        loop = asyncio.get_event_loop()
+
+        # Workers stop after processing updates queued before this
+        for index, updates in enumerate(self._queues):
+            try:
+                await loop.run_in_executor(
+                    None, updates.put, None, True, self.options.stop_timeout
+                )
+            except queue.Full:
+                self._terminate(index)
+
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+
+            await loop.run_in_executor(None, process.join, self.options.stop_timeout)
+
+            self._terminate(index)
+
+        logging.info("Stopped workers")
+
+    def _terminate(self, index: int):
+        """Terminate worker with index if it's still running."""
+
+        process = self._processes[index]
+
+        if process is None:
+            return
+
+        if process.is_alive():
+            logging.warning("Terminating worker %s (pid %s)", index, process.pid)
+            process.terminate()
+            process.join()
+
+        self._processes[index] = None
+
+    def run(self):  # pragma: no cover
+        """Run supervisor and stop it on KeyboardInterrupt or SIGTERM."""
+
+        loop = asyncio.get_event_loop()
+
+        try:
+            loop.add_signal_handler(signal.SIGTERM, loop.stop)
+        except NotImplementedError:
+            pass
+
+        try:
+            loop.run_until_complete(self.start())
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            loop.run_until_complete(self.stop())
@@ -1,7 +1,13 @@
 """Useful helpers"""
 
-from typing import Awaitable
+from typing import Any, Awaitable, Optional, Callable, Dict, Set, TypeVar
 import asyncio
+import warnings
+import copy
+import time
+
+
+OptionsType = TypeVar("OptionsType", bound="Options")
 
 
 async def wait_with_stopped(awaitable: Awaitable, stopped: Awaitable, loop=None):
@@ -23,8 +29,92 @@ async def wait_with_stopped(awaitable: Awaitable, stopped: Awaitable, loop=None)
     return done.pop().result()
 
 
+class lazy_property:  # pylint: disable=invalid-name
+    """
+    Read-only property that is computed on first access. Computed value is
+    stored in slot with property's name prefixed by underscore (this slot
+    should be present in class's `__slots__`).
+    """
+
+    def __init__(self, function: Callable):
+        self.function: Callable = function
+        self.slot: str = "_" + function.__name__
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.function(instance)
+            object.__setattr__(instance, self.slot, value)
+            return value
+
+    def __set__(self, instance, value):
+        raise AttributeError("Can't modify '{}'".format(self.function.__name__))
+
+
+class Options:  # pylint: disable=too-few-public-methods
+    """
+    Base class for groups of options. Options are annotated class
+    attributes of subclass with default values, instance is created with
+    changed values as keyword arguments. Unknown options raise `TypeError`
+    just like unknown keyword arguments do.
+    """
+
+    def __init__(self, **changes):
+        # Defaults are copied, so functions are not bound as methods
+        for name in self._names():
+            setattr(self, name, getattr(type(self), name))
+
+        self._change(changes)
+
+    @classmethod
+    def _names(cls) -> Set[str]:
+        return {
+            name for klass in cls.__mro__
+            for name in vars(klass).get("__annotations__", ())
+        }
+
+    def _change(self, changes: Dict[str, Any]):
+        names = self._names()
+
+        for name, value in changes.items():
+            if name not in names:
+                raise TypeError("Unknown option: {}".format(name))
+
+            setattr(self, name, value)
+
+    def replace(self: OptionsType, **changes) -> OptionsType:
+        """Return copy of options with changed values."""
+
+        options = copy.copy(self)
+        options._change(changes)  # pylint: disable=protected-access
+
+        return options
+
+    def __repr__(self):
+        changes = ", ".join(
+            "{}={!r}".format(name, value) for name, value in sorted(vars(self).items())
+        )
+
+        return "{}({})".format(type(self).__name__, changes)
+
+
 def read_only_properties(*attrs):
-    """Make passed attributes read-only"""
+    """
+    Make passed attributes read-only (deprecated, declare attributes with
+    `vkpore.schema.field` instead).
+    """
+
+    warnings.warn(
+        "read_only_properties is deprecated, declare attributes with "
+        "vkpore.schema.field instead",
+        DeprecationWarning, stacklevel=2,
+    )
+
     def decorator(cls):
         original_setattr = cls.__setattr__
 
@@ -37,3 +127,82 @@ def read_only_properties(*attrs):
 
         return cls
     return decorator
+
+
+class TokenBucket:
+    """
+    Rate limiter that allows `rate` actions per `window` seconds with
+    bursts of up to `burst` actions. Budget is refilled continuously, so
+    action is allowed as soon as at least one token is available.
+    """
+
+    __slots__ = ("rate", "window", "burst", "_tokens", "_updated")
+
+    def __init__(self, rate: float, window: float = 1.0,
+                 burst: Optional[float] = None):
+        if rate <= 0 or window <= 0:
+            raise ValueError("Rate and window should be positive")
+
+        #: Amount of actions allowed per window
+        self.rate: float = rate
+        #: Window length in seconds
+        self.window: float = window
+        #: Maximum amount of tokens that can be accumulated
+        self.burst: float = max(1.0, rate if burst is None else burst)
+
+        self._tokens: float = self.burst
+        self._updated: float = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated) * self.rate / self.window,
+        )
+
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Amount of tokens available right now."""
+        self._refill()
+        return self._tokens
+
+    def delay(self) -> float:
+        """Return seconds left until one token is available."""
+        self._refill()
+
+        if self._tokens >= 1:
+            return 0.0
+
+        return (1 - self._tokens) * self.window / self.rate
+
+    def try_acquire(self) -> bool:
+        """Take one token if it is available and return True if it was."""
+        self._refill()
+
+        if self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def drain(self):
+        """Spend all available tokens (for example, after hitting limits)."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+    async def acquire(self):
+        """Wait until token is available and take it."""
+        while not self.try_acquire():
+            await asyncio.sleep(self.delay())
+
+
+def call_key(method: str, arguments: Dict[str, Any]) -> str:
+    """
+    Return string that identifies call of method with arguments (doesn't
+    depend on order of arguments).
+    """
+
+    return method + ":" + repr(sorted(arguments.items()))
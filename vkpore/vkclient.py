@@ -1,42 +1,149 @@
 """Module with classes related to interacting with Vkontakte."""
 
-from typing import List, Dict, Union, Awaitable, Optional, Callable
-from asyncio import Future, AbstractEventLoop as AEL
+from typing import (
+    List, Dict, Union, Awaitable, Optional, Iterable, Tuple, Set, Deque, Sequence,
+)
+from collections import deque
 import asyncio
+from asyncio import AbstractEventLoop as AEL
 import logging
-import json
 
 from aiohttp import ClientSession, ClientError
 
-from .utils import wait_with_stopped
-
-
-class Request(Future):
-    """Request in queue for execution."""
-
-    __slots__ = ("method", "arguments")
-
-    def __init__(self, method, arguments):
-        super().__init__()
-
-        self.method: str = method
-        self.arguments: Dict[str, Union[str, int]] = arguments
+from .batching import (
+    Batch, BatchSizer, Fusion, FusedRequest,
+    CODE_SIZE_LIMIT, OVERLOAD_CODES, FUSIONS,
+)
+from .codec import JsonCodec, get_codec
+from .cache import ResponseCache
+from .utils import Options, wait_with_stopped, call_key, TokenBucket
+
+# Names defined in separate modules are still importable from here
+from .errors import VkApiError, RetryPolicy, RETRYABLE_CODES  # pylint: disable=unused-import
+from .scheduling import (  # pylint: disable=unused-import
+    Request, RequestQueue, PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH, PRIORITIES,
+)
+from .broadcast import (  # pylint: disable=unused-import
+    Progress, BROADCAST_LIMIT, broadcast,
+)
+
+
+#: Template of urls for calling methods
+API_URL = "https://api.vk.com/method/{method}"
+
+
+#: Read-only methods which identical calls are performed once if they are
+#: requested while the same call is queued or performed.
+COALESCED_METHODS = (
+    "users.get", "groups.getById", "groups.getMembers",
+    "messages.getConversationsById", "utils.resolveScreenName",
+)
+
+
+class ClientOptions(Options):  # pylint: disable=too-few-public-methods
+    """Options of `VkClient` (see it's description)."""
+
+    #: Amount of requests per `window` seconds
+    rate: float = 19
+    #: Maximum amount of requests in burst
+    burst: float = 1
+    #: Window of rate limit in seconds
+    window: float = 1.0
+    #: Policy for retrying failed calls (default policy if None)
+    retry: Optional[RetryPolicy] = None
+    #: Template of methods' urls
+    api_url: str = API_URL
+    #: Maximum size of code for `execute` in bytes
+    code_size_limit: int = CODE_SIZE_LIMIT
+    #: Codec's name or instance of `JsonCodec`
+    codec: Union[str, JsonCodec] = "json"
+    #: Controller of amount of calls in `execute` (new for every client if None)
+    sizer: Optional[BatchSizer] = None
+    #: Methods which identical calls are coalesced
+    coalesce: Iterable[str] = COALESCED_METHODS
+    #: Cache of responses (responses are not cached if None)
+    cache: Optional[ResponseCache] = None
+    #: Methods which calls are merged (`FUSIONS` if None)
+    fuse: Optional[Dict[str, Fusion]] = None
+    #: Priorities of methods (`PRIORITIES` if None)
+    priorities: Optional[Dict[str, int]] = None
+    #: How many times more turns priority higher by one gets
+    priority_ratio: float = 3.0
 
 
 class VkClient:  #pylint: disable=too-many-instance-attributes
-    """Class for interacting with Vkontakte."""
+    """
+    Class for interacting with Vkontakte. Requests performed by client are
+    limited to `rate` requests per `window` seconds with bursts of up to
+    `burst` requests. Defaults keep client within Vkontakte's limit of 20
+    requests per second for group's token. Methods are called with urls
+    produced from `api_url` template (it can point to emulator, for
+    example).
+
+    Code for `execute` is limited to `code_size_limit` bytes, calls that
+    don't fit in one `execute` are performed directly. Amount of calls in
+    one `execute` is adjusted by `sizer` (see `BatchSizer`): batches that
+    failed with timeout or runtime error are split and performed again.
+    Requests are sent in order of priority (see `RequestQueue`), which is
+    passed to `request` or taken from `priorities` by method. Priority
+    higher by one gets `priority_ratio` times more turns.
+
+    Identical calls of methods from `coalesce` (read-only methods only!)
+    requested at the same time are performed once with the highest of
+    callers' priorities. Callers share response, so it should not be
+    modified. Responses of `request` and `raw_request` can be cached with
+    `cache` (see `ResponseCache`). Queued calls of methods from `fuse` that
+    differ only by ids are merged into one call (see `Fusion`). Calls are
+    encoded and responses are decoded with `codec` ("json", "orjson",
+    "ujson", "auto" or instance of `JsonCodec`).
+
+    Options are passed as `ClientOptions` or as keyword arguments.
+    """
+
+    def __init__(self, token: str, session: ClientSession = None, loop: AEL = None,
+                 options: Optional[ClientOptions] = None, **changes):
+        self.options: ClientOptions = (options or ClientOptions()).replace(**changes)
+        options = self.options
 
-    def __init__(self, token: str, session: ClientSession = None, loop: AEL = None):
         self._token: str = token
         self._loop: AEL = loop or asyncio.get_event_loop()
         self._session: ClientSession = session or ClientSession()
-        self._api_url: str = "https://api.vk.com/method/{method}"
+        self._api_url: str = options.api_url
         self._version: str = "5.92"
-        self._loop_pause: float = 1 / 19
+        self._limiter: TokenBucket = TokenBucket(
+            options.rate, options.window, options.burst
+        )
+        self._retry: RetryPolicy = options.retry or RetryPolicy()
+        self._codec: JsonCodec = get_codec(options.codec)
+        self._code_size_limit: int = options.code_size_limit
+        self._sizer: BatchSizer = options.sizer or BatchSizer()
+
+        # Queued or performed calls that can be shared
+        self._coalesce: frozenset = frozenset(options.coalesce)
+        self._inflight: Dict[str, Request] = {}
+        self._coalesced: int = 0
+        self._dropped: int = 0
+
+        self._cache: Optional[ResponseCache] = options.cache
+        self._fusions: Dict[str, Fusion] = (
+            FUSIONS if options.fuse is None else options.fuse
+        )
+        self._priorities: Dict[str, int] = (
+            PRIORITIES if options.priorities is None else options.priorities
+        )
 
-        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queue: RequestQueue = RequestQueue(options.priority_ratio, self._loop)
         self._running_loop: Optional[Awaitable] = None
 
+        # Requests that didn't fit into previous batches
+        self._carried: Deque[Request] = deque()
+        # Requests that are too big for `execute` and performed directly
+        self._direct: Set[asyncio.Future] = set()
+
+        # Clients of the same group this client can take requests from
+        self._siblings: Tuple["VkClient", ...] = ()
+        self._wakeup: asyncio.Event = asyncio.Event()
+
         self._stopped: asyncio.Event = asyncio.Event()
         self._stopped.set()
 
@@ -47,50 +154,365 @@ class VkClient:  #pylint: disable=too-many-instance-attributes
         stopped = asyncio.Task(self._stopped.wait())
 
         while True:
-            await asyncio.sleep(self._loop_pause)
-
-            request = await wait_with_stopped(self._queue.get(), stopped)
+            request = await wait_with_stopped(self._next_request(), stopped)
 
             if request is None:
                 break
 
-            requests: List[Request] = [request]
+            batch = Batch(
+                self._codec, self._sizer.size, self._code_size_limit, self._fusions
+            )
 
-            for _ in range(24):
-                try:
-                    requests.append(self._queue.get_nowait())
-                except asyncio.QueueEmpty:
-                    break
+            if batch.oversized(request):
+                self._request_directly(request)
+                continue
+
+            # Requests that arrive while waiting will join this batch
+            await self._limiter.acquire()
 
-            code = ["return ["]
+            if self._alive(request):
+                batch.add(request)
 
-            for request in requests:
-                code.append("API.{}({}),".format(
-                    request.method,
-                    json.dumps(request.arguments, ensure_ascii=False),
-                ))
+            self._fill(batch)
+
+            if not batch.requests:
+                continue
+
+            for request in batch.originals:
+                request.attempts += 1
+
+            started = self._loop.time()
+
+            try:
+                body = await self._raw_request("execute", code=batch.code())
+            except VkApiError as error:
+                if not self._overloaded(error):
+                    self._resolve_failed(batch.originals, error)
+                    continue
+
+                self._sizer.overload()
+
+                if self._sizer.size < len(batch.requests):
+                    self._split(batch.originals)
+                else:
+                    self._resolve_failed(batch.originals, error)
+            else:
+                self._sizer.success(self._loop.time() - started)
+                self._resolve(batch, body)
+
+    @staticmethod
+    def _overloaded(error: VkApiError) -> bool:
+        """Return True if `execute` failed because batch was too heavy."""
+
+        return (
+            error.code in OVERLOAD_CODES
+            or isinstance(error.__cause__, asyncio.TimeoutError)
+        )
+
+    def _split(self, requests: List[Request]):
+        """Perform requests of failed batch again in smaller batches."""
+
+        logging.debug("Splitting batch of %s requests", len(requests))
+
+        for request in requests:
+            request.attempts -= 1
+
+        self._carried.extendleft(reversed(requests))
+
+    def _fill(self, batch: Batch):
+        """
+        Add queued requests to batch until it's full. Request that doesn't
+        fit is left for the next batch.
+        """
 
-            code.append("];")
+        while not batch.full:
+            request = self._take()
+
+            if request is None:
+                return
+
+            if batch.oversized(request):
+                self._request_directly(request)
+            elif not batch.add(request):
+                self._carried.appendleft(request)
+                return
+
+    def _request_directly(self, request: Request):
+        """Perform request without `execute` in background."""
+
+        async def perform():
+            await self._limiter.acquire()
+
+            # Request could be cancelled or expire while waiting for limiter
+            if not self._alive(request):
+                return
+
+            request.attempts += 1
+
+            try:
+                body = await self._raw_request(request.method, **request.arguments)
+            except VkApiError as error:
+                self._fail(request, error)
+            else:
+                if not request.done():
+                    request.set_result(body["response"])
+
+        task = asyncio.ensure_future(perform(), loop=self._loop)
+        self._direct.add(task)
+        task.add_done_callback(self._direct.discard)
+
+    async def _next_request(self) -> Request:
+        """
+        Return request from client's queue or taken from sibling's queue.
+        Waits until client's queue is not empty or any of siblings
+        has too many requests in queue.
+        """
+
+        while True:
+            request = self._take()
+
+            if request is not None:
+                return request
+
+            self._wakeup.clear()
+
+            getter = asyncio.ensure_future(self._queue.get(), loop=self._loop)
+            waker = asyncio.ensure_future(self._wakeup.wait(), loop=self._loop)
+
+            try:
+                await asyncio.wait(
+                    (getter, waker), return_when=asyncio.FIRST_COMPLETED,
+                )
+            except asyncio.CancelledError:
+                # Don't lose request if it was received right before stop
+                if getter.done() and not getter.cancelled():
+                    self._queue.put_nowait(getter.result())
+                raise
+            finally:
+                waker.cancel()
+                getter.cancel()
+
+            if getter.done() and not getter.cancelled():
+                request = getter.result()
+
+                if self._alive(request):
+                    return request
+
+    def _take(self) -> Optional[Request]:
+        """
+        Return next request if there is one without waiting. Requests that
+        were cancelled or expired are dropped.
+        """
+
+        while True:
+            if self._carried:
+                request = self._carried.popleft()
+            elif not self._queue.empty():
+                request = self._queue.get_nowait()
+            else:
+                stolen = self._steal(1)
+
+                if not stolen:
+                    return None
 
-            responses = await self.raw_request("execute", code="".join(code))
+                request = stolen[0]
 
-            if responses is None:
-                responses = [False] * len(requests)
+            if self._alive(request):
+                return request
 
-            for response, request in zip(responses, requests):
+    def _alive(self, request: Request) -> bool:
+        """
+        Return True if request should be sent. Drops cancelled and expired
+        requests.
+        """
+
+        if not request.done():
+            if request.deadline is None or request.deadline > self._loop.time():
+                return True
+
+            request.set_exception(asyncio.TimeoutError())
+
+        self._dropped += 1
+
+        return False
+
+    def _steal(self, limit: int) -> List[Request]:
+        """
+        Take up to `limit` requests from siblings that have more requests
+        than they can send in one batch.
+        """
+
+        stolen: List[Request] = []
+
+        if not self._siblings or limit <= 0:
+            return stolen
+
+        siblings = sorted(self._siblings, key=lambda c: -c.pending)
+
+        for sibling in siblings:
+            stolen.extend(sibling.take(limit - len(stolen)))
+
+        if stolen:
+            logging.debug("Took %s requests from siblings", len(stolen))
+
+        return stolen
+
+    def take(self, limit: int) -> List[Request]:
+        """
+        Remove and return up to `limit` queued requests while client has
+        more requests than it can send in one batch.
+        """
+
+        taken: List[Request] = []
+
+        while len(taken) < limit and self._queue.qsize() > self._sizer.size:
+            taken.append(self._queue.get_nowait())
+
+        return taken
+
+    def notify(self):
+        """Wake up idle client to check siblings' queues."""
+        self._wakeup.set()
+
+    def _enqueue(self, request: Request):
+        """Put request in queue and notify siblings if it is too long."""
+
+        self._queue.put_nowait(request)
+
+        if self._queue.qsize() > self._sizer.size:
+            for sibling in self._siblings:
+                sibling.notify()
+
+    def _fail(self, request: Request, error: VkApiError):
+        """Fail request with error or schedule it's retry."""
+
+        if request.done():  # pragma: no cover
+            return
+
+        if error.code == 6:
+            self._limiter.drain()
+
+        if not self._retry.should_retry(error, request.attempts):
+            request.set_exception(error)
+            return
+
+        logging.debug("Retrying request: %s", error)
+
+        self._loop.call_later(
+            self._retry.delay(request.attempts), self._requeue, request, error
+        )
+
+    def _requeue(self, request: Request, error: VkApiError):
+        if request.done():  # pragma: no cover
+            return
+
+        if self._stopped.is_set():
+            request.set_exception(error)
+        else:
+            self._enqueue(request)
+
+    def _resolve_failed(self, requests: Iterable[Request], error: VkApiError):
+        """Fail every request with error of the whole batch."""
+
+        for request in requests:
+            self._fail(request, VkApiError(error.code, error.message, error.method))
+
+    def _resolve(self, batch: Batch, body: Dict):
+        """
+        Resolve batch's requests with their results from response of
+        `execute`. Failed calls are returning `false` and their errors are
+        listed in "execute_errors" in the same order.
+        """
+
+        responses = body.get("response")
+
+        if not isinstance(responses, list) or len(responses) != len(batch.requests):
+            self._resolve_failed(
+                batch.originals, VkApiError(0, "Malformed response", "execute")
+            )
+            return
+
+        errors = iter(body.get("execute_errors", ()))
+
+        for response, call in zip(responses, batch.requests):
+            parts: Sequence[Request]
+
+            if isinstance(call, FusedRequest):
+                parts = call.parts
+            else:
+                parts = (call,)
+
+            if response is False:
+                self._resolve_failed(
+                    parts, VkApiError.from_error(next(errors, {}), call.method)
+                )
+                continue
+
+            if isinstance(call, FusedRequest):
                 try:
-                    if response is False:
-                        request.set_result(None)
-                    else:
-                        request.set_result(response)
-                except asyncio.InvalidStateError:  # pragma: no cover
-                    pass
+                    results = call.split(response)
+                except (AttributeError, KeyError, TypeError):
+                    self._resolve_failed(
+                        parts, VkApiError(0, "Malformed response", call.method)
+                    )
+                    continue
+            else:
+                results = [response]
+
+            for request, part in zip(parts, results):
+                if not request.done():
+                    request.set_result(part)
 
     @property
     def group_id(self):
         """Client's group id"""
         return self._group_id
 
+    @property
+    def pending(self) -> int:
+        """Amount of requests waiting in client's queue."""
+        return self._queue.qsize() + len(self._carried)
+
+    @property
+    def dropped(self) -> int:
+        """Amount of cancelled or expired requests that were not sent."""
+        return self._dropped
+
+    @property
+    def coalesced(self) -> int:
+        """Amount of calls that were merged with identical calls."""
+        return self._coalesced
+
+    @property
+    def batch_size(self) -> int:
+        """Current maximum amount of calls in one `execute`."""
+        return self._sizer.size
+
+    @property
+    def execute_latency(self) -> float:
+        """Smoothed latency of `execute` in seconds."""
+        return self._sizer.latency
+
+    @property
+    def load(self) -> float:
+        """
+        Estimated delay in seconds before newly queued request will be
+        sent. Depends on amount of queued requests and remaining rate budget.
+        """
+
+        batches = self._queue.qsize() // self._sizer.size + 1
+        missing = max(0.0, batches - self._limiter.available)
+
+        return missing * self._limiter.window / self._limiter.rate
+
+    def set_siblings(self, clients: Iterable["VkClient"]):
+        """
+        Set clients (usually of the same group) which queues this client
+        can take requests from when it's idle.
+        """
+
+        self._siblings = tuple(c for c in clients if c is not self)
+
     @property
     def group_name(self):
         """Client's group name"""
@@ -113,12 +535,17 @@ class VkClient:  #pylint: disable=too-many-instance-attributes
         )
 
         if enable_longpoll:
-            await self.raw_request(
-                "groups.setLongPollSettings",
-                group_id=self._group_id,
-                api_version=self._version,
-                enabled=1,
-            )
+            await self.enable_longpoll()
+
+    async def enable_longpoll(self):
+        """Enable Bots Longpoll API for client's group."""
+
+        await self.raw_request(
+            "groups.setLongPollSettings",
+            group_id=self._group_id,
+            api_version=self._version,
+            enabled=1,
+        )
 
     def start(self):
         """
@@ -149,110 +576,299 @@ class VkClient:  #pylint: disable=too-many-instance-attributes
             await self._running_loop
             self._running_loop = None
 
-    async def request(self, method: str, **kwargs):
+        if self._direct:
+            await asyncio.gather(*self._direct)
+
+    async def request(self, method: str, priority: Optional[int] = None,
+                      timeout: Optional[float] = None, **kwargs):
         """
         Perform a request to method with arguments. Access token and version
         added explicitly, but you can override it with your arguments. Request
         if performed from background loop and is batched in order to use
-        `execute` method. Returns response or None if error occured.
+        `execute` method. Requests with higher `priority` are sent first
+        (default priority depends on method). Returns response or raises
+        `VkApiError` if this call failed.
+
+        If `timeout` (in seconds) is passed and request was not completed
+        in time, `asyncio.TimeoutError` is raised. Requests that expired or
+        were cancelled before being sent are not sent at all.
         """
 
         if not self._running_loop:
             raise RuntimeError("Loop for requests is not running!")
 
-        request = Request(method, kwargs)
-        await self._queue.put(request)
-        return await request
+        resolved = self._priorities.get(method, PRIORITY_NORMAL) \
+            if priority is None else priority
+
+        deadline = None if timeout is None else self._loop.time() + timeout
+
+        if self._cache is None or not self._cache.caches(method):
+            return await self._request(method, kwargs, resolved, deadline)
+
+        response = await self._cache.get(method, kwargs)
+
+        if response is None:
+            response = await self._request(method, kwargs, resolved, deadline)
+            await self._cache.set(method, kwargs, response)
+
+        return response
+
+    async def _request(self, method: str, kwargs: Dict, priority: int,
+                       deadline: Optional[float]):
+        """Queue request or join identical queued request and wait for it."""
+
+        if method not in self._coalesce:
+            request = Request(method, kwargs, priority, deadline)
+            self._enqueue(request)
+            return await self._wait(request, deadline)
+
+        key = call_key(method, kwargs)
+
+        inflight: Optional[Request] = self._inflight.get(key)
+
+        if inflight is None:
+            request = self._inflight[key] = Request(method, kwargs, priority, deadline)
+            request.add_done_callback(lambda _: self._forget(key, request))
+            self._enqueue(request)
+        else:
+            request = inflight
+            self._coalesced += 1
+
+            # Request is sent as soon as the most urgent caller needs it
+            if priority > request.priority:
+                self._queue.reprioritize(request, priority)
+
+            # Request is needed while anyone is waiting for it
+            if request.deadline is not None:
+                request.deadline = None if deadline is None else max(
+                    request.deadline, deadline
+                )
+
+        request.waiters += 1
+
+        try:
+            # Cancellation of one caller shouldn't cancel others
+            return await self._wait(asyncio.shield(request), deadline)
+        finally:
+            request.waiters -= 1
+
+            if not request.waiters:
+                request.cancel()
+
+    async def _wait(self, awaitable: Awaitable, deadline: Optional[float]):
+        """Wait for awaitable until deadline."""
+
+        if deadline is None:
+            return await awaitable
+
+        return await asyncio.wait_for(awaitable, deadline - self._loop.time())
+
+    def _forget(self, key: str, request: Request):
+        if self._inflight.get(key) is request:
+            del self._inflight[key]
+
+    async def broadcast(self, peer_ids: Iterable[int], progress: Progress = None,
+                        **kwargs) -> Dict[int, Union[int, VkApiError]]:
+        """
+        Send message to many peers with as few calls as possible (up to
+        `BROADCAST_LIMIT` peers in one `messages.send`). Arguments are
+        passed to `messages.send`. Returns dictionary with message id or
+        `VkApiError` for every peer. If `progress` is passed, it's called
+        with amount of processed peers and total amount of peers as they
+        are processed.
+        """
+
+        return await broadcast(lambda: self, peer_ids, progress, kwargs)
 
     async def raw_request(self, method: str, **kwargs):
         """
         Perform a request to method with arguments. Access token and version
         added explicitly, but you can override it with your arguments.
+        Failed calls are retried according to client's retry policy.
         Returns response or None if error occured.
         """
 
+        cache = self._cache
+
+        if cache is not None and not cache.caches(method):
+            cache = None
+
+        if cache is not None:
+            response = await cache.get(method, kwargs)
+
+            if response is not None:
+                return response
+
+        attempts = 0
+
+        while True:
+            await self._limiter.acquire()
+
+            attempts += 1
+
+            try:
+                body = await self._raw_request(method, **kwargs)
+            except VkApiError as error:
+                if error.code == 6:
+                    self._limiter.drain()
+
+                if not self._retry.should_retry(error, attempts):
+                    logging.exception("Performing raw request")
+                    return None
+
+                await asyncio.sleep(self._retry.delay(attempts))
+            else:
+                if cache is not None:
+                    await cache.set(method, kwargs, body["response"])
+
+                return body["response"]
+
+    def _encode(self, value):
+        """
+        Return argument's value suitable for form data: lists of ids are
+        joined with commas, other objects (keyboards, etc.) are encoded to
+        JSON the same way they are encoded in `execute`.
+        """
+
+        if isinstance(value, (list, tuple)) and \
+                all(isinstance(i, (int, str)) for i in value):
+            return ",".join(str(i) for i in value)
+
+        if isinstance(value, (dict, list, tuple)):
+            return self._codec.dumps(value)
+
+        return value
+
+    async def _raw_request(self, method: str, **kwargs) -> Dict:
+        """
+        Perform a request and return whole response's body. Raises
+        `VkApiError` if call failed.
+        """
+
         logging.debug("Request: [%s %s]", method, str(kwargs))
 
         arguments = {
             "v": self._version,
             "access_token": self._token,
-            **{k: v for k, v in kwargs.items() if v is not None}
+            **{k: self._encode(v) for k, v in kwargs.items() if v is not None}
         }
 
         url = self._api_url.format(method=method)
 
         try:
             async with self._session.post(url, data=arguments) as raw_response:
-                response = await raw_response.json(content_type=None)
+                body = await raw_response.json(
+                    content_type=None, loads=self._codec.loads
+                )
+        except (ValueError, ClientError, asyncio.TimeoutError) as error:
+            raise VkApiError(0, repr(error), method) from error
 
-                if not response or response.get("response", None) is None:
-                    return None
+        if not isinstance(body, dict):
+            raise VkApiError(0, "Malformed response", method)
 
-                return response["response"]
-        except (json.JSONDecodeError, ClientError):
-            logging.exception("Performing raw request")
-            return None
+        if "error" in body:
+            raise VkApiError.from_error(body["error"], method)
+
+        if body.get("response") is None:
+            raise VkApiError(0, "Empty response", method)
+
+        return body
 
-    def longpoll(self, default_longpoll=None) -> Callable[[], Callable[[], List[Dict]]]:
+    def longpoll(self, default_longpoll: Optional[Dict] = None) -> "Longpoll":
         """
-        Return coroutine for receiving updates for current group from
-        vkontakte using Bots Longpoll API.
+        Return receiver of updates for current group from vkontakte using
+        Bots Longpoll API. Receiving continues from `default_longpoll`
+        state (see `Longpoll.state`) if it's specified.
         """
 
-        if default_longpoll is None:
-            longpoll: Dict[str, Union[int, str]] = {}
-        else:
-            longpoll = {**default_longpoll}
+        return Longpoll(self, default_longpoll)
+
+    async def close_session(self):  # pragma: no cover
+        """Close this client's session."""
+        if self._session:
+            await self._session.close()
+
+
+class Longpoll:
+    """
+    Receiver of updates for client's group using Bots Longpoll API. Await
+    instance to get next updates. State is kept between calls, so updates
+    are received without gaps: when key expires or request fails, only
+    server and key are refreshed and receiving continues from the last "ts".
+    """
+
+    def __init__(self, client: VkClient, state: Optional[Dict] = None):
+        self._client: VkClient = client
+
+        state = state or {}
 
-        async def refresh():
-            """Get new values for longpolling."""
+        self.server: str = state.get("server", "")
+        self.key: str = state.get("key", "")
+        self.ts: Union[int, str] = state.get("ts", "")  # pylint: disable=invalid-name
 
-            response = await self.request(
-                "groups.getLongPollServer", group_id=self.group_id
+    @property
+    def state(self) -> Dict[str, Union[int, str]]:
+        """Values required to continue receiving: "server", "key" and "ts"."""
+        return {"server": self.server, "key": self.key, "ts": self.ts}
+
+    async def refresh(self, keep_ts: bool = False):
+        """Get new values for longpolling (except "ts" if `keep_ts`)."""
+
+        try:
+            response = await self._client.request(
+                "groups.getLongPollServer", group_id=self._client.group_id
             )
+        except VkApiError:
+            logging.exception("Longpoll refresh")
+        else:
+            self.server = response["server"]
+            self.key = response["key"]
 
-            if response is not None:
-                longpoll["server"] = response["server"]
-                longpoll["key"] = response["key"]
-                longpoll["ts"] = response["ts"]
+            if not keep_ts or self.ts == "":
+                self.ts = response["ts"]
 
-        async def get():
-            """Request new updates from Vkontakte."""
+    async def __call__(self) -> Optional[List[Dict]]:
+        """Request new updates from Vkontakte (None if request failed)."""
 
-            while not longpoll:
-                await refresh()
+        while not self.server:
+            await self.refresh(keep_ts=True)
 
-            arguments = {
-                "ts": longpoll["ts"],
-                "act": "a_check",
-                "key": longpoll["key"],
-                "wait": 25,
-            }
+        arguments = {
+            "ts": self.ts,
+            "act": "a_check",
+            "key": self.key,
+            "wait": 25,
+        }
 
-            try:
-                post = self._session.post(longpoll["server"], data=arguments)
+        try:
+            post = self._client._session.post(  # pylint: disable=protected-access
+                self.server, data=arguments
+            )
 
-                async with post as raw_response:
-                    response = await raw_response.json(content_type=None)
+            async with post as raw_response:
+                response = await raw_response.json(
+                    content_type=None,
+                    loads=self._client._codec.loads,  # pylint: disable=protected-access
+                )
 
-            except (json.JSONDecodeError, ClientError):
-                logging.exception("Longpoll request")
-                longpoll.clear()
-                return
+        except (ValueError, ClientError, asyncio.TimeoutError):
+            logging.exception("Longpoll request")
+            self.server = ""
+            return None
 
-            if "ts" in response:
-                longpoll["ts"] = response["ts"]
+        if "ts" in response:
+            self.ts = response["ts"]
 
-            if "failed" in response:
-                if response["failed"] != 1:
-                    longpoll.clear()
-                return
+        if "failed" in response:
+            # 1: history is lost, new "ts" is received
+            # 2: key expired, continue with the same "ts"
+            # 3: information is lost, start over
+            if response["failed"] != 1:
+                self.server = ""
 
-            return response["updates"]
+                if response["failed"] != 2:
+                    self.ts = ""
 
-        return get
+            return None
 
-    async def close_session(self):  # pragma: no cover
-        """Close this client's session."""
-        if self._session:
-            await self._session.close()
+        return response["updates"]
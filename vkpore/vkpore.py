@@ -1,29 +1,133 @@
 """Module with core class for organizing event flow."""
 
-from typing import List, Dict, Awaitable, Optional, Iterable, Tuple
-from random import choice
+from typing import (
+    List, Dict, Awaitable, Optional, Iterable, Tuple, Union, AsyncIterator,
+    Callable, Hashable,
+)
+from random import choice, sample
 from asyncio import AbstractEventLoop as AEL
 import asyncio
 import logging
 
 from aiohttp import ClientSession
 
-from .vkclient import VkClient
-from .events import Event, Callback, MessageNew, EventRaw
-from .utils import wait_with_stopped
+from .vkclient import VkClient, Longpoll, API_URL
+from .broadcast import Progress, broadcast
+from .errors import VkApiError
+from .checkpoint import CheckpointStore, Checkpointer
+from .codec import JsonCodec
+from .dispatcher import Dispatcher, EventStream
+from .events import Event, EventFactory, Callback, EventRaw, EVENTS
+from .utils import Options
 
 
-class Vkpore():
+#: Amount of longpoll responses that can be received ahead of processing
+LONGPOLL_BUFFER = 4
+
+#: Delay in seconds before receiving updates after unexpected error
+LONGPOLL_ERROR_DELAY = 1.0
+
+
+#: Possible strategies for selecting client of the group
+BALANCING = ("least_loaded", "two_choices", "random")
+
+
+def peer_key(event: Event) -> Optional[Tuple[int, int]]:
+    """
+    Return key for ordering events by chat: group's id and event's
+    `peer_id` (None for events without peer).
+    """
+
+    peer_id = getattr(event, "peer_id", None)
+
+    return (event.group_id, peer_id) if peer_id else None
+
+
+class Settings(Options):  # pylint: disable=too-few-public-methods
+    """Options of `Vkpore` (see it's description)."""
+
+    #: Strategy for selecting client of the group (see `BALANCING`)
+    balancing: str = "least_loaded"
+    #: Maximum amount of running callbacks (unlimited if None)
+    max_running: Optional[int] = None
+    #: Maximum amount of running callbacks for every event type
+    max_running_per_event: Optional[int] = None
+    #: Maximum amount of keys with running callbacks with `ordered`
+    max_keys: Optional[int] = None
+    #: Run callbacks for events with the same key one after another
+    ordered: bool = False
+    #: Function returning key for ordering events (`peer_key` if None)
+    order_key: Optional[Callable[[Event], Optional[Hashable]]] = None
+    #: Store for longpoll state of groups (not saved if None)
+    checkpoint: Optional[CheckpointStore] = None
+    #: Minimal delay in seconds between saves of longpoll state
+    checkpoint_interval: float = 1.0
+    #: Receive updates with longpoll
+    longpoll: bool = True
+    #: Receive updates only for groups of `(index, count)` shard
+    shard: Optional[Tuple[int, int]] = None
+    #: Requests per second for every client
+    rate: float = 19
+    #: Template of urls for calling methods
+    api_url: str = API_URL
+    #: Codec (or it's name) for encoding calls
+    codec: Union[str, JsonCodec] = "json"
+
+
+class Vkpore():  # pylint: disable=too-many-instance-attributes
     """
     Class for receiving events, calling methods, callback registration
     and execution. You can specify loop and session to use.
+
+    Amount of callbacks running at the same time can be limited with
+    `max_running` and `max_running_per_event`. When limit is reached,
+    receiving of new updates is paused until some of callbacks complete.
+
+    If `ordered` is True, callbacks for events with the same key returned
+    by `order_key` (chat by default, see `peer_key`) run one after another
+    in order of events, while events with different keys are handled
+    concurrently. Events with key None are not ordered. Amount of keys with
+    running callbacks can be limited with `max_keys`.
+
+    When group has multiple tokens, client for request is selected with
+    `balancing` strategy: "least_loaded" (client with smallest estimated
+    delay), "two_choices" (best of two random clients) or "random". Idle
+    clients also take requests from overloaded clients of the same group.
+
+    Methods are called with urls produced from `api_url` template, calls
+    are encoded with `codec` and every client performs no more than `rate`
+    requests per second (see `VkClient`).
+
+    If `checkpoint` store is specified, longpoll state of every group is
+    saved after received updates are dispatched (no more than once in
+    `checkpoint_interval` seconds) and receiving resumes from it on start.
+
+    If `longpoll` is False, updates are not received with longpoll. Use
+    `CallbackReceiver` to receive them with Callback API instead. With
+    `shard` equal to `(index, count)`, updates are received only for
+    groups with `group_id % count == index` (see `Supervisor`).
+
+    Options are passed as `Settings` or as keyword arguments.
     """
 
     def __init__(self, tokens: Iterable[str], loop: AEL = None,
-                 session: ClientSession = None):
+                 session: ClientSession = None,
+                 settings: Optional[Settings] = None, **changes):
+        self.settings: Settings = (settings or Settings()).replace(**changes)
+        settings = self.settings
+
+        if settings.balancing not in BALANCING:
+            raise ValueError("Unknown balancing strategy: {}".format(settings.balancing))
+
         self._loop: AEL = loop or asyncio.get_event_loop()
         self._callbacks: Dict[str, List[Callback]] = {}
-        self._futures: List[asyncio.Future] = []
+        self._events: Dict[str, EventFactory] = dict(EVENTS)
+        self._loops: List[asyncio.Future] = []
+
+        self._dispatcher: Dispatcher = Dispatcher(
+            self._loop, settings.max_running, settings.max_running_per_event,
+            settings.max_keys,
+        )
 
         self._tokens: Tuple[str, ...] = tuple(tokens)
         self._clients: Dict[int, List[VkClient]] = {}
@@ -33,38 +137,221 @@ class Vkpore():
 
         self._session: Optional[ClientSession] = session
 
+        self._streams: List[EventStream] = []
+
+        self._checkpointer: Optional[Checkpointer] = None
+
+        if settings.checkpoint is not None:
+            self._checkpointer = Checkpointer(
+                settings.checkpoint, settings.checkpoint_interval
+            )
+
+        self._skipped: int = 0
+
     def get_client(self, group_id):
-        """Return random client for specified group_id."""
+        """Return client for specified group_id according to balancing."""
 
         clients = self._clients.get(group_id)
 
         if not clients:
             return None
 
+        if len(clients) == 1:
+            return clients[0]
+
+        if self.settings.balancing == "least_loaded":
+            return min(clients, key=lambda c: c.load)
+
+        if self.settings.balancing == "two_choices":
+            first, second = sample(clients, 2)
+            return first if first.load <= second.load else second
+
         return choice(clients)
 
-    @staticmethod
-    def _get_event_class(update_type):  # pragma: no cover
-        if update_type == "message_new":
-            return MessageNew
+    async def broadcast(self, group_id: int, peer_ids: Iterable[int],
+                        progress: Progress = None, **kwargs
+                        ) -> Dict[int, Union[int, VkApiError]]:
+        """
+        Send message from group to many peers (see `VkClient.broadcast`).
+        Calls are spread between group's clients according to balancing.
+        """
+
+        if not self._clients.get(group_id):
+            raise ValueError("Unknown group: {}".format(group_id))
+
+        return await broadcast(
+            lambda: self.get_client(group_id), peer_ids, progress, kwargs
+        )
+
+    async def stream(self, types: Optional[Iterable[str]] = None,
+                     group_ids: Optional[Iterable[int]] = None,
+                     maxsize: int = 100) -> AsyncIterator[Event]:
+        """
+        Return async iterator over events for updates of `types` (like
+        "message_new") from groups with `group_ids` (any if None). Events
+        are buffered up to `maxsize`, when buffer is full receiving of new
+        updates is paused. Iteration ends when application stops. If you
+        stop iterating before that, call iterator's `aclose()` to
+        unsubscribe right away (otherwise it's done when iterator is
+        garbage collected).
+
+        .. code-block:: python
+
+            async for event in app.stream(["message_new"]):
+                ...
+        """
+
+        stream = EventStream(types, group_ids, maxsize)
+        self._streams.append(stream)
+
+        try:
+            while True:
+                event = await stream.get()
+
+                if event is None:
+                    return
+
+                yield event
+        finally:
+            stream.close()
+            self._streams.remove(stream)
+
+    @property
+    def group_ids(self) -> List[int]:
+        """Ids of groups of application's clients (after start)."""
+        return list(self._clients)
+
+    @property
+    def skipped(self) -> int:
+        """Amount of received updates skipped due to absence of callbacks."""
+        return self._skipped
+
+    def register_event(self, update_type: str, event_class: EventFactory):
+        """
+        Use `event_class` for updates with type `update_type`. Class will be
+        created with arguments `(group_id, source)` and should have name
+        "vk:<update_type>".
+        """
 
-        return EventRaw
+        self._events[update_type] = event_class
 
-    async def _longpoll_loop(self, group_id):
-        get_updates = self.get_client(group_id).longpoll()
+    async def _longpoll_loop(self, group_id: int, state: Optional[Dict] = None):
+        """
+        Receive and process updates for group starting from longpoll
+        `state`. Updates are received in separate task, so next longpoll
+        request is sent while previous updates are processed. Loop runs
+        until cancelled.
+        """
+
+        get_updates = self.get_client(group_id).longpoll(state)
+
+        queue: asyncio.Queue = asyncio.Queue(LONGPOLL_BUFFER)
+
+        reader = asyncio.ensure_future(
+            self._read_updates(get_updates, queue), loop=self._loop
+        )
+
+        def stop_reading(_):
+            # Reader shouldn't stop, but if it does, loop stops after
+            # processing updates received before that
+            if queue.full():
+                asyncio.ensure_future(queue.put(None), loop=self._loop)
+            else:
+                queue.put_nowait(None)
+
+        reader.add_done_callback(stop_reading)
+
+        try:
+            while True:
+                received = await queue.get()
+
+                if received is None:
+                    reader.result()
+                    raise RuntimeError("Receiving of updates stopped")
+
+                updates, checkpoint = received
 
-        stopped = asyncio.Task(self._stopped.wait())
+                await self.process_updates(group_id, updates)
+
+                if self._checkpointer is not None:
+                    self._checkpointer.update(group_id, checkpoint)
+        finally:
+            reader.remove_done_callback(stop_reading)
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+    @staticmethod
+    async def _read_updates(get_updates: Longpoll, queue: asyncio.Queue):
+        """
+        Put updates from longpoll into queue (with state to continue after
+        them) until cancelled. Unexpected errors are logged and receiving
+        continues after `LONGPOLL_ERROR_DELAY` seconds.
+        """
 
         while True:
-            updates = await wait_with_stopped(get_updates(), stopped)
+            try:
+                updates = await get_updates()
+            except Exception as error:  # pylint: disable=broad-except
+                if isinstance(error, asyncio.CancelledError):
+                    raise
+
+                logging.exception("Receiving updates")
+                await asyncio.sleep(LONGPOLL_ERROR_DELAY)
+                continue
+
+            if updates:
+                await queue.put((updates, get_updates.state))
+
+    async def process_updates(self, group_id: int, updates: List[Dict]):
+        """
+        Create events for updates of group and pass them to callbacks and
+        streams. Used for updates from longpoll and Callback API.
+        """
+
+        for update in updates:
+            update_type = update["type"]
 
-            if updates is None:
-                break
+            event_class = self._events.get(update_type, EventRaw)
+            name = "vk:" + update_type
 
-            for update in updates:
-                event_class = self._get_event_class(update["type"])
+            # Updates without callbacks for their events are passed to
+            # callbacks for "vk:raw", like updates of unknown types
+            if event_class is EventRaw or name not in self._callbacks:
+                name = "vk:raw"
 
-                self.dispatch(event_class(group_id, update["object"]))
+            streams = [
+                s for s in self._streams if s.accepts(update_type, group_id)
+            ] if self._streams else []
+
+            callbacks = self._callbacks.get(name)
+
+            # Don't bother creating events nobody is waiting for
+            if not callbacks and not streams:
+                self._skipped += 1
+                continue
+
+            # Streams receive events of update's class even if callbacks
+            # receive raw event
+            if callbacks and name == "vk:raw" and event_class is not EventRaw:
+                event: Event = EventRaw(group_id, update["object"])
+                streamed = event_class(group_id, update["object"]) if streams else event
+            else:
+                event = streamed = event_class(group_id, update["object"])
+
+            if callbacks:
+                await self._dispatcher.wait(name, self._key(event))
+
+            if streams:
+                if streamed is event:
+                    streamed.initialize(self, callbacks or [])
+                else:
+                    streamed.initialize(self, [])
+
+                for stream in streams:
+                    await stream.put(streamed)
+
+            if callbacks:
+                self.dispatch(event)
 
     async def start(self):
         """Start application related loops and perform initializations."""
@@ -72,11 +359,16 @@ class Vkpore():
         if self._session is None:
             self._session = ClientSession()
 
+        settings = self.settings
+
         # Create and inititalize clients
         for token in self._tokens:
-            client = VkClient(token, self._session, self._loop)
+            client = VkClient(
+                token, self._session, self._loop,
+                api_url=settings.api_url, codec=settings.codec, rate=settings.rate,
+            )
 
-            await client.initialize()
+            await client.initialize(enable_longpoll=settings.longpoll)
 
             if client.group_id not in self._clients:
                 self._clients[client.group_id] = []
@@ -87,17 +379,29 @@ class Vkpore():
         self._stopped.clear()
 
         # Create and start loops for receiving updates for groups
-        for group_id in self._clients:
-            self._futures.append(
+        for group_id in self._clients if settings.longpoll else ():
+            if settings.shard and group_id % settings.shard[1] != settings.shard[0]:
+                continue
+
+            state = None
+
+            if self._checkpointer is not None:
+                state = await self._checkpointer.store.load(group_id)
+
+            self._loops.append(
                 asyncio.ensure_future(
-                    self._longpoll_loop(group_id),
+                    self._longpoll_loop(group_id, state),
                     loop=self._loop
                 )
             )
 
+        if self._checkpointer is not None:
+            self._checkpointer.start()
+
         # Start execute loops for clients
         for clients in self._clients.values():
             for client in clients:
+                client.set_siblings(clients)
                 client.start()
 
         logging.info("Started")
@@ -112,8 +416,23 @@ class Vkpore():
 
         self._stopped.set()
 
+        # Let consumers of streams finish and loops waiting for them continue
+        for stream in self._streams:
+            stream.close()
+
+        # Stop loops receiving updates
+        for loop in self._loops:
+            loop.cancel()
+
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops.clear()
+
         # Wait for running callbacks to stop
-        await asyncio.gather(*self._futures)
+        await self._dispatcher.join()
+
+        # Save last longpoll states
+        if self._checkpointer is not None:
+            await self._checkpointer.stop()
 
         # Wait for running loops to stop
         tasks = []
@@ -151,14 +470,21 @@ class Vkpore():
 
         event.initialize(self, callbacks)
 
-        future = asyncio.ensure_future(event.next(), loop=self._loop)
-
-        self._futures.append(future)
+        future = self._dispatcher.run(event.name, event.next(), self._key(event))
 
         logging.debug("Dispatched event: %s", event)
 
         return future
 
+    def _key(self, event: Event) -> Optional[Hashable]:
+        """Return key for ordering event's callbacks (None if unordered)."""
+        if not self.settings.ordered:
+            return None
+
+        order_key = self.settings.order_key or peer_key
+
+        return order_key(event)
+
     def run_until_complete(self, awaitable: Awaitable):  # pragma: no cover
         """Run specified awaitable in application's loop."""
         self._loop.run_until_complete(awaitable)
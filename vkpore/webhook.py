@@ -0,0 +1,178 @@
+"""
+Module with receiver of updates sent by Vkontakte with Callback API. It
+can be used instead of longpoll (see `Vkpore`'s `longpoll` argument).
+"""
+
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
+from collections import OrderedDict
+import asyncio
+import logging
+
+from aiohttp import web
+
+from .errors import VkApiError
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .vkpore import Vkpore  # pylint: disable=cyclic-import
+
+
+#: Amount of last events' ids remembered for skipping repeated deliveries
+REMEMBERED_EVENTS = 1000
+
+
+class CallbackReceiver:
+    """
+    HTTP handler for Callback API requests of groups of `app`. Requests
+    are checked with `secret` (if specified), confirmation requests are
+    answered with code from `confirmations` (requested from Vkontakte if
+    group is absent there). Updates are acknowledged with "ok" right after
+    they are queued and are processed in background the same way updates
+    from longpoll are, so callbacks and streams work in both modes.
+
+    No more than `maxsize` updates are queued, after that acknowledgement
+    waits for processing. Vkontakte repeats requests that were not
+    acknowledged in time, repeated updates are skipped by "event_id".
+
+    Use `handle` as handler in your own `aiohttp` application or run
+    receiver's own server with `start`.
+    """
+
+    def __init__(self, app: "Vkpore", secret: Optional[str] = None,
+                 confirmations: Optional[Dict[int, str]] = None,
+                 maxsize: int = 1000):
+        self.app: "Vkpore" = app
+        self.secret: Optional[str] = secret
+        self.confirmations: Dict[int, str] = dict(confirmations or {})
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._events: "OrderedDict[str, None]" = OrderedDict()
+
+        self._processor: Optional[asyncio.Future] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Handle request from Vkontakte."""
+
+        try:
+            update = await request.json()
+            group_id = int(update["group_id"])
+            update_type = update["type"]
+        except (ValueError, TypeError, KeyError):
+            return web.Response(status=400, text="bad request")
+
+        if self.secret is not None and update.get("secret") != self.secret:
+            return web.Response(status=403, text="forbidden")
+
+        if self.app.get_client(group_id) is None:
+            logging.warning("Callback API request for unknown group: %s", group_id)
+            return web.Response(status=404, text="unknown group")
+
+        if update_type == "confirmation":
+            return web.Response(text=await self._confirmation(group_id))
+
+        event_id = update.get("event_id")
+
+        if self._repeated(event_id):
+            return web.Response(text="ok")
+
+        self._ensure_processor()
+
+        try:
+            await self._queue.put((group_id, update))
+        except asyncio.CancelledError:
+            # Update was not queued, so it should be accepted when repeated
+            self._events.pop(event_id, None)
+            raise
+
+        return web.Response(text="ok")
+
+    async def _confirmation(self, group_id: int) -> str:
+        """Return confirmation code for group."""
+
+        if group_id not in self.confirmations:
+            client = self.app.get_client(group_id)
+
+            try:
+                response = await client.request(
+                    "groups.getCallbackConfirmationCode", group_id=group_id
+                )
+            except VkApiError:
+                logging.exception("Confirmation code request")
+                return ""
+
+            self.confirmations[group_id] = response["code"]
+
+        return self.confirmations[group_id]
+
+    def _repeated(self, event_id: Any) -> bool:
+        """Remember event's id and return True if it was seen before."""
+
+        if not event_id:
+            return False
+
+        if event_id in self._events:
+            return True
+
+        self._events[event_id] = None
+
+        while len(self._events) > REMEMBERED_EVENTS:
+            self._events.popitem(last=False)
+
+        return False
+
+    def _ensure_processor(self):
+        if self._processor is None or self._processor.done():
+            self._processor = asyncio.ensure_future(self._process_loop())
+
+    async def _process_loop(self):
+        """Pass queued updates to application until cancelled."""
+
+        while True:
+            group_id, update = await self._queue.get()
+
+            try:
+                await self.app.process_updates(group_id, [update])
+            except Exception as error:  # pylint: disable=broad-except
+                if isinstance(error, asyncio.CancelledError):
+                    raise
+
+                logging.exception("Callback API update processing")
+            finally:
+                self._queue.task_done()
+
+    async def join(self):
+        """Wait until queued updates are processed."""
+        await self._queue.join()
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8080,
+                    path: str = "/") -> Tuple[str, int]:
+        """Start server with receiver at `path` and return it's address."""
+
+        application = web.Application()
+        application.router.add_post(path, self.handle)
+
+        self._runner = web.AppRunner(application, access_log=None)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        self._ensure_processor()
+
+        host, port = self._runner.addresses[0][:2]
+
+        logging.info("Callback API receiver is running at %s:%s", host, port)
+
+        return host, port
+
+    async def stop(self):
+        """Stop server and processing of queued updates."""
+
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+        if self._processor:
+            self._processor.cancel()
+            await asyncio.gather(self._processor, return_exceptions=True)
+            self._processor = None